@@ -1,60 +1,42 @@
 # -*- mode: python ; coding: utf-8 -*-
 
-import os
-from modulefinder import ModuleFinder
+# Lean onedir build: the agent's own imports are found by PyInstaller's analysis of main.py,
+# only modules it can't see are listed here. The dist\PyITAgent folder is meant to be copied
+# to a local folder (eg. C:\Program Files\PyITAgent) so scheduled runs don't unpack anything.
 
-# Use the current directory
-root_dir = os.getcwd()
+# Collector backends are imported by name from collectors.registry.BACKENDS, keep this in sync
+hidden_imports = [
+    'collectors.powershell',
+    'collectors.wmi',
+    'collectors.linux',
+    'collectors.fixture',
+]
 
-finder = ModuleFinder()
-for subdir, dirs, files in os.walk(root_dir):
-    for file in files:
-        if file.endswith('.py'):
-            finder.run_script(os.path.join(subdir, file))
-
-# Get the names of all the imported modules
-imported_modules = list(finder.modules.keys())
-
-# Optionally, filter out standard library and built-in modules
-excluded_modules = ['__future__', '__main__', 'sys', 'os']
-
-hidden_imports = [module for module in imported_modules if module not in excluded_modules]
-
-# Print the list or write it to a file
-print(hidden_imports)
-
-def collect_subdirectories(base_path, target_folder):
-    """Recursively collect all subdirectories and files from base_path."""
-    data_files = []
-    for root, dirs, files in os.walk(base_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            # Create a relative path for files to preserve the directory structure
-            relative_path = os.path.relpath(file_path, base_path)
-            # Append the tuple (source, target) to the data_files list
-            data_files.append((file_path, os.path.join(target_folder, os.path.dirname(relative_path))))
-    return data_files
-
-# Collect all subdirectories and files from 'models' directory
-models_data = collect_subdirectories('models', 'models')
+# Standard library packages the agent never uses
+excluded_modules = [
+    'tkinter',
+    'unittest',
+    'pydoc',
+    'doctest',
+    'lib2to3',
+    'xmlrpc',
+    'sqlite3',
+    'curses',
+    'pdb',
+]
 
 a = Analysis(
     ['main.py'],
-    datas=[
-        ('api/*', 'api'), 
-        ('config/*', 'config'), 
-        *models_data,  # Add the collected model data here
-        ('runtime/*', 'runtime'), 
-        ('utils/*', 'utils')
-    ],
     pathex=[],
     binaries=[],
+    datas=[],
     hiddenimports=hidden_imports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excluded_modules,
     noarchive=False,
+    optimize=1,
 )
 
 pyz = PYZ(a.pure)
@@ -62,16 +44,14 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='PyITAgent',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    # UPX saves disk space but every start pays for decompressing the DLLs again
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -79,4 +59,13 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
     icon=['app_icon.ico'],
-)
\ No newline at end of file
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='PyITAgent',
+)
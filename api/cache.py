@@ -0,0 +1,84 @@
+# cache.py
+
+import threading
+import time
+
+from config.settings import get_settings
+from utils.store import JsonStore
+
+class LookupCache:
+    """Maps manufacturer names, models and serial numbers to their Snipe-IT IDs between runs."""
+
+    def __init__(self, filename='pyitagent_cache.json'):
+        self.store = JsonStore(filename)
+        self._lock = threading.Lock()
+
+    def ttl(self):
+        return get_settings().config['GENERAL'].get('lookup_cache_ttl', 86400)
+
+    def get(self, kind, key):
+        if self.ttl() <= 0:
+            return None
+        with self._lock:
+            entry = self.store.load().get(kind, {}).get(str(key))
+        if entry is None or time.time() - entry['time'] > self.ttl():
+            return None
+        return entry['id']
+
+    def set(self, kind, key, id):
+        if id is None or self.ttl() <= 0:
+            return
+        with self._lock:
+            self.store.load().setdefault(kind, {})[str(key)] = {'id': id, 'time': time.time()}
+            self.store.save()
+
+    def invalidate(self, kind, key):
+        with self._lock:
+            if self.store.load().get(kind, {}).pop(str(key), None) is not None:
+                self.store.save()
+
+    def invalidate_id(self, kind, id):
+        """Drop every entry of this kind pointing at `id`, eg. a model which was deleted in Snipe-IT."""
+        with self._lock:
+            entries = self.store.load().get(kind, {})
+            stale = [key for key, entry in entries.items() if entry['id'] == id]
+            for key in stale:
+                del entries[key]
+            if stale:
+                self.store.save()
+
+    def clear(self):
+        with self._lock:
+            self.store.data = {}
+            self.store.save()
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = LookupCache()
+    return _cache
+
+# Payload field -> kind of the cached ID it refers to
+REFERENCES = {'manufacturer_id': 'manufacturer', 'model_id': 'model'}
+
+def invalidate_rejected(messages, payload):
+    """Drop the cached IDs a rejected POST or PATCH sent, only those the validation messages name if they name fields."""
+    fields = [field for field in REFERENCES if payload.get(field) is not None]
+    if isinstance(messages, dict):
+        fields = [field for field in fields if field in messages]
+    for field in fields:
+        get_cache().invalidate_id(REFERENCES[field], payload[field])
+
+def model_key(model_name, manufacturer_id):
+    return f"{model_name}|{manufacturer_id}"
+
+def is_not_found(error):
+    # Snipe-IT answers with a 404 for IDs which no longer exist
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code == 404
+
+def is_missing(response):
+    # ...or with a 200 and an error status, eg. "Asset does not exist." for a deleted asset
+    return response.get('status') == 'error' and "does not exist" in str(response.get('messages', ''))
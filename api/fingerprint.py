@@ -0,0 +1,58 @@
+# fingerprint.py
+
+import hashlib
+import json
+import threading
+
+from config.settings import get_settings
+from utils.store import JsonStore
+
+_force_full_sync = False
+
+def set_full_sync(enabled):
+    """Send the full payload on every update, eg. when run with --full-sync."""
+    global _force_full_sync
+    _force_full_sync = enabled
+
+def full_sync():
+    return _force_full_sync or get_settings().config['GENERAL'].get('force_full_sync', False)
+
+def fingerprint(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class SyncState:
+    """Remembers a hash of every field last sent successfully for each asset."""
+
+    def __init__(self, filename='pyitagent_state.json'):
+        self.store = JsonStore(filename)
+        self._lock = threading.Lock()
+
+    def fingerprints(self, hardware_id):
+        return self.store.load().setdefault('fingerprints', {}).get(str(hardware_id), {})
+
+    def changes(self, hardware_id, payload):
+        """Return only the fields of the payload which changed since the last successful sync."""
+        if full_sync():
+            return dict(payload)
+        with self._lock:
+            previous = self.fingerprints(hardware_id)
+        return {field: value for field, value in payload.items() if previous.get(field) != fingerprint(value)}
+
+    def record(self, hardware_id, payload):
+        with self._lock:
+            fingerprints = self.store.load().setdefault('fingerprints', {})
+            fingerprints.setdefault(str(hardware_id), {}).update({field: fingerprint(value) for field, value in payload.items()})
+            self.store.save()
+
+    def forget(self, hardware_id):
+        with self._lock:
+            if self.store.load().setdefault('fingerprints', {}).pop(str(hardware_id), None) is not None:
+                self.store.save()
+
+_sync_state = None
+
+def get_sync_state():
+    global _sync_state
+    if _sync_state is None:
+        _sync_state = SyncState()
+    return _sync_state
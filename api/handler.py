@@ -1,29 +1,201 @@
 # handler.py
 
-import requests
-from config.settings import GlobalSettings
+import random
+import threading
+import time
+from config.settings import get_settings
+from utils.tracing import span
+
+_session = None
+_session_key = None
+_session_lock = threading.Lock()
+
+def get_session():
+    # One keep-alive session per process, rebuilt only if the server or API key changed
+    global _session, _session_key
+    server = get_settings().config['SERVER']
+    key = (server['site'], server['api_key'])
+    with _session_lock:
+        if _session is None or _session_key != key:
+            if _session is not None:
+                _session.close()
+            # requests takes longer to import than the rest of the agent, only load it once a request is sent
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                "accept": "application/json",
+                "Authorization": f"Bearer {server['api_key']}",
+                "content-type": "application/json"
+            })
+            _session, _session_key = session, key
+        return _session
+
+class TokenBucket:
+    """Paces requests so the process stays below the Snipe-IT API throttle instead of running into it."""
+
+    def __init__(self, rate_per_minute):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, min(rate_per_minute, 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take a token, sleeping until one is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        # The server told us to back off, hold every thread of this process until then
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def limit(self, rate_per_minute):
+        # Follow the server if it advertises a lower limit than configured
+        with self._lock:
+            if 0 < rate_per_minute / 60.0 < self.rate:
+                self.refill(time.monotonic())
+                self.rate = rate_per_minute / 60.0
+
+_bucket = None
+_bucket_rate = None
+_bucket_lock = threading.Lock()
+_stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'throttled_seconds': 0.0}
+_stats_lock = threading.Lock()
+
+def get_bucket():
+    global _bucket, _bucket_rate
+    rate = get_settings().config['SERVER'].get('rate_limit', 120)
+    with _bucket_lock:
+        if rate <= 0:
+            return None
+        if _bucket is None or _bucket_rate != rate:
+            _bucket, _bucket_rate = TokenBucket(rate), rate
+        return _bucket
+
+def count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def get_request_stats():
+    """Counters of sent requests, retries, 429 responses and time spent throttled in this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+def retry_after(response, now=None):
+    """Seconds the server asked us to wait, from Retry-After or X-RateLimit-Reset, or None."""
+    now = time.time() if now is None else now
+    value = response.headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+    reset = response.headers.get('X-RateLimit-Reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - now)
+        except ValueError:
+            pass
+    return None
+
+def backoff(attempt, server):
+    # Full jitter, so agents started by the same GPO push don't retry in lockstep
+    base = server.get('backoff_base', 1.0)
+    return random.uniform(0, min(server.get('backoff_max', 60.0), base * 2 ** attempt))
+
+def observe_rate_limit(response, bucket):
+    if bucket is None:
+        return
+    try:
+        bucket.limit(int(response.headers.get('X-RateLimit-Limit', 0)))
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None and int(remaining) <= 0:
+            wait = retry_after(response)
+            bucket.pause(wait if wait is not None else 60.0 / max(bucket.rate * 60.0, 1.0))
+    except ValueError:
+        pass
 
 def send_request(method, endpoint, payload=None):
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {GlobalSettings().config['SERVER']['api_key']}",
-        "content-type": "application/json"
-    }
-    url = f"{GlobalSettings().config['SERVER']['site']}/{endpoint}"
-    match method:
-        case 'GET':
-            response = requests.get(url, headers=headers)
-        case 'POST':
-            response = requests.post(url, json=payload, headers=headers)
-        case 'PATCH':
-            response = requests.patch(url, json=payload, headers=headers)
-        case _:
-            raise ValueError("Unsupported HTTP method")
-
-    if response.ok:
-        return response.json()
-    else:
-        response.raise_for_status()
+    server = get_settings().config['SERVER']
+    session = get_session()
+    bucket = get_bucket()
+    url = f"{server['site']}/{endpoint}"
+    # Never let a hung server block the scheduled task forever
+    timeout = (server.get('connect_timeout', 10), server.get('read_timeout', 60))
+    if method not in ('GET', 'POST', 'PATCH'):
+        raise ValueError("Unsupported HTTP method")
+
+    # Reported without the query string, which may contain names and serial numbers
+    with span('request', f"{method} {endpoint.split('?')[0]}") as attributes:
+        max_retries = server.get('max_retries', 5)
+        for attempt in range(max_retries + 1):
+            if bucket is not None:
+                count('throttled_seconds', bucket.acquire())
+            count('requests')
+            match method:
+                case 'GET':
+                    response = session.get(url, timeout=timeout)
+                case 'POST':
+                    response = session.post(url, json=payload, timeout=timeout)
+                case 'PATCH':
+                    response = session.patch(url, json=payload, timeout=timeout)
+            observe_rate_limit(response, bucket)
+            attributes.update(status=response.status_code, attempts=attempt + 1,
+                              sent=len(response.request.body or b''), received=len(response.content))
+            if response.status_code != 429:
+                break
+            count('rate_limited')
+            if attempt == max_retries:
+                break
+
+            # Throttled, wait as long as the server asks (plus jitter) or back off exponentially
+            count('retries')
+            wait = retry_after(response)
+            if wait is None:
+                wait = backoff(attempt, server)
+            else:
+                wait += random.uniform(0, server.get('backoff_base', 1.0))
+            if bucket is not None:
+                bucket.pause(wait)
+            else:
+                time.sleep(wait)
+                count('throttled_seconds', wait)
+
+        if response.ok:
+            return response.json()
+        else:
+            response.raise_for_status()
+
+def created_id(response):
+    # Snipe-IT returns the created object in the payload of a successful POST
+    payload = response.get('payload')
+    if isinstance(payload, dict):
+        return payload.get('id')
+    return None
 
 def resolve_payload(type, values, collected_hardware = None):
     match type:
@@ -34,7 +206,7 @@ def resolve_payload(type, values, collected_hardware = None):
                 'asset_tag': values['serial_number'],
                 'model_id': values['model_id']
             }
-            if not GlobalSettings().config['GENERAL'].get('pyitagent_asset_tag_generation', True):
+            if not get_settings().config['GENERAL'].get('pyitagent_asset_tag_generation', True):
                 hardware.pop('asset_tag')
             if collected_hardware:
                 for field, value in collected_hardware.items():
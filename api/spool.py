@@ -0,0 +1,155 @@
+# spool.py
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from api.handler import send_request
+from api.fingerprint import get_sync_state
+from api.cache import get_cache, is_missing
+from config.settings import get_settings
+from utils.store import state_path
+
+class SpooledError(Exception):
+    """Raised when a request couldn't be sent and was stored in the spool instead."""
+
+def is_transient(error):
+    # Errors which are worth retrying later: the server is unreachable, overloaded or throttling us
+    import requests
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+class Spool:
+    """An append-only file of asset updates which couldn't be sent, replayed on a later run.
+
+    Most entries are a POST or PATCH ready to be sent again. A SYNC entry holds the data
+    of a computer which couldn't even be looked up, it is resolved from its inventory
+    (manufacturer, model and asset) when it is replayed.
+    """
+
+    def __init__(self, filename='pyitagent_spool.jsonl'):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def path(self):
+        return state_path(self.filename)
+
+    def append(self, method, endpoint, payload, key, hardware_id=None, inventory=None):
+        entry = {'method': method, 'endpoint': endpoint, 'payload': payload, 'key': key, 'hardware_id': hardware_id}
+        if inventory is not None:
+            entry['inventory'] = inventory
+        with self._lock:
+            try:
+                with open(self.path(), 'a') as file:
+                    file.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"Could not write to the spool: {e}")
+
+    def entries(self):
+        with self._lock:
+            try:
+                with open(self.path(), 'r') as file:
+                    lines = file.readlines()
+            except OSError:
+                return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A half written line from a run which was killed, skip it
+                continue
+        return entries
+
+    def pending(self):
+        """Number of assets with an update waiting in the spool."""
+        return len(self.collapse(self.entries()))
+
+    def collapse(self, entries):
+        """Keep only the latest entry per asset, in the order they were last spooled."""
+        latest = {}
+        for entry in entries:
+            latest.pop(entry['key'], None)
+            latest[entry['key']] = entry
+        return list(latest.values())
+
+    def replace(self, entries):
+        with self._lock:
+            path = self.path()
+            if not entries:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w') as file:
+                for entry in entries:
+                    file.write(json.dumps(entry) + "\n")
+            os.replace(temp_path, path)
+
+    def replay(self, entry):
+        if entry['method'] == 'SYNC':
+            # Imported here, the asset models import the spool themselves
+            from models.assets.manager import replay_unresolved
+            replay_unresolved(entry)
+            return True
+        response = send_request(entry['method'], entry['endpoint'], payload=entry['payload'])
+        if response.get('status') != 'success':
+            print(f"Spooled {entry['method']} to {entry['endpoint']} was rejected: {response.get('messages')}")
+            if entry['method'] == 'PATCH' and is_missing(response):
+                # The asset was deleted meanwhile, its serial number is looked up again on the next run
+                get_cache().invalidate('hardware', entry['key'])
+            return True  # Rejected for good, retrying won't help
+        hardware_id = entry.get('hardware_id') or (response.get('payload') or {}).get('id')
+        if hardware_id is not None:
+            if entry['method'] == 'POST':
+                get_cache().set('hardware', entry['key'], hardware_id)
+            get_sync_state().record(hardware_id, entry['payload'])
+        return True
+
+    def drain(self):
+        """Send every spooled update, the ones which still fail stay in the spool."""
+        spooled = self.entries()
+        entries = self.collapse(spooled)
+        if not entries:
+            return 0
+
+        print(f"Replaying {len(entries)} spooled updates")
+        workers = get_settings().config['GENERAL'].get('spool_workers', 4)
+
+        def attempt(entry):
+            try:
+                return self.replay(entry)
+            except Exception as e:
+                if is_transient(e):
+                    return False
+                print(f"Dropping spooled {entry['method']} to {entry['endpoint']}: {e}")
+                return True
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            done = list(executor.map(attempt, entries))
+        remaining = [entry for entry, sent in zip(entries, done) if not sent]
+        # A replayed SYNC entry may have spooled its POST or PATCH again meanwhile, keep those too
+        self.replace(self.collapse(remaining + self.entries()[len(spooled):]))
+        return len(entries) - len(remaining)
+
+_spool = None
+
+def get_spool():
+    global _spool
+    if _spool is None:
+        _spool = Spool()
+    return _spool
+
+def send_or_spool(method, endpoint, payload, key, spool_payload=None, hardware_id=None):
+    """Send a request, if the server can't be reached the full payload is spooled and SpooledError raised."""
+    try:
+        return send_request(method, endpoint, payload=payload)
+    except Exception as e:
+        if not is_transient(e):
+            raise
+        # The asset ID is kept so its fingerprints can be recorded once the update is replayed
+        get_spool().append(method, endpoint, spool_payload if spool_payload is not None else payload, key, hardware_id)
+        raise SpooledError(f"Snipe-IT could not be reached, the update for {key} was spooled: {e}")
@@ -0,0 +1,84 @@
+# bench_edid.py
+#
+# Checks collectors.edid against the corpus in benchmarks/fixtures/edid and measures how
+# many blobs per second it parses. Regenerate the corpus with python -m benchmarks.edid_corpus
+#
+#   python -m benchmarks.bench_edid --iterations 20000
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.edid_corpus import CORPUS_DIR
+from collectors.edid import parse_edid, parse_displayid, EdidError
+
+def load_corpus():
+    with open(os.path.join(CORPUS_DIR, 'corpus.json'), 'r') as file:
+        expected = json.load(file)
+    blobs = {}
+    for name in expected:
+        with open(os.path.join(CORPUS_DIR, f"{name}.bin"), 'rb') as file:
+            blobs[name] = file.read()
+    return blobs, expected
+
+def parser_for(values):
+    return parse_displayid if values.get('kind') == 'displayid' else parse_edid
+
+def mismatches(parsed, values, prefix=''):
+    found = []
+    for key, value in values.items():
+        if key == 'kind':
+            continue
+        if isinstance(value, dict):
+            found += mismatches(parsed.get(key) or {}, value, f"{prefix}{key}.")
+        elif parsed.get(key) != value:
+            found.append(f"{prefix}{key}: expected {value!r}, got {parsed.get(key)!r}")
+    return found
+
+def verify(blobs, expected):
+    failures = 0
+    for name, values in expected.items():
+        try:
+            parsed = parser_for(values)(blobs[name])
+            problems = mismatches(parsed, values) if 'error' not in values else [f"expected {values['error']}, it parsed"]
+        except EdidError as e:
+            problems = [] if values.get('error') == 'EdidError' else [f"raised {e}"]
+        failures += bool(problems)
+        print(f"{name:<26}{'ok' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"    {problem}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify and benchmark the EDID parser against the fixture corpus')
+    parser.add_argument('--iterations', type=int, default=10000, help='Times every blob is parsed')
+    arguments = parser.parse_args()
+
+    blobs, expected = load_corpus()
+    failures = verify(blobs, expected)
+
+    # The truncated blob only measures how fast a bad blob is rejected, leave it out of the throughput
+    valid = [(parser_for(values), blobs[name]) for name, values in expected.items() if 'error' not in values]
+    print(f"{'blob':<26}{'bytes':>7}{'us/parse':>10}")
+    for name, values in expected.items():
+        if 'error' in values:
+            continue
+        parse = parser_for(values)
+        started = time.perf_counter()
+        for _ in range(arguments.iterations):
+            parse(blobs[name])
+        print(f"{name:<26}{len(blobs[name]):>7}{(time.perf_counter() - started) / arguments.iterations * 1e6:>10.2f}")
+
+    started = time.perf_counter()
+    for _ in range(arguments.iterations):
+        for parse, blob in valid:
+            parse(blob)
+    elapsed = time.perf_counter() - started
+    count = arguments.iterations * len(valid)
+    print(f"{count} parses in {elapsed:.2f}s: {count / elapsed:,.0f} blobs/s, {elapsed / count * 1e6:.2f}us per blob")
+    if failures:
+        raise SystemExit(f"{failures} corpus entries did not parse as expected")
+
+if __name__ == "__main__":
+    main()
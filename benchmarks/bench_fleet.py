@@ -0,0 +1,258 @@
+# bench_fleet.py
+#
+# Simulates a fleet of agents enrolling or re-syncing against a Snipe-IT server, to see
+# what load a rollout (eg. a new custom_fields.json) puts on it. Every virtual agent runs
+# the real Manufacturer/Model/Hardware/Monitor code with a randomized hardware profile,
+# many of them concurrently. Against the in-process mock by default, or --target.
+#
+#   python -m benchmarks.bench_fleet --agents 500 --workers 32 --mode enroll
+#   python -m benchmarks.bench_fleet --agents 500 --workers 32 --mode steady --change-rate 0.2
+#   python -m benchmarks.bench_fleet --target https://snipeit.example.com/api/v1 --api-key ... --agents 50
+
+import argparse
+import contextlib
+import io
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import prepare_workdir, reset_local_state
+from benchmarks.mock_snipeit import MockSnipeIT
+from api import cache, fingerprint, spool
+from collectors.base import Collector, monitor_property, property_key
+from utils.probe import ProbeResult
+from utils.store import JsonStore
+
+# Manufacturer -> [(model, model number)], as the inventory reports them
+HARDWARE = {
+    'Dell Inc.': [('OptiPlex 7090', '0ABC12'), ('Latitude 5420', '0F2K8N'), ('Precision 3660', '0J8C2D')],
+    'HP': [('HP EliteBook 840 G8', '880D'), ('HP ProDesk 400 G7', '8703')],
+    'LENOVO': [('20W0003AUS', 'ThinkPad T14 Gen 2'), ('11T3000AUS', 'ThinkCentre M70q')],
+    'Microsoft Corporation': [('Surface Laptop 4', 'Surface_Laptop_4_1952:1953')],
+}
+
+MONITORS = [('Dell Inc.', 'DELL P2419H', 23.8), ('Dell Inc.', 'DELL U2722D', 27.0), ('HP', 'HP E24 G4', 23.8), ('Lenovo', 'LEN T24i-20', 23.8)]
+
+def hardware_profile(index, rng, max_monitors, custom_fields):
+    manufacturer = rng.choice(list(HARDWARE))
+    model, model_number = rng.choice(HARDWARE[manufacturer])
+    serial = ''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789') for _ in range(7))
+    disk_size = rng.choice([256, 512, 1024]) * 1000 ** 3
+    inventory = {
+        'manufacturer': manufacturer,
+        'model': model,
+        'model_number': model_number,
+        'serial_number': f"CN0{index:05d}/{serial}" if manufacturer == 'Dell Inc.' else serial,
+        'hostname': f"FLEET-{index:05d}",
+        'mac_address': ':'.join(f"{rng.randrange(256):02X}" for _ in range(6)),
+        'disks': [{'media_type': 'Fixed hard disk media', 'model': 'NVMe SSD', 'serial': serial, 'size': disk_size}],
+        'volumes': [{'device_id': 'C:', 'size': disk_size, 'free': int(disk_size * rng.uniform(0.1, 0.9))}],
+    }
+    monitors = []
+    for number in range(rng.randint(0, max_monitors)):
+        monitor_manufacturer, monitor_model, size = rng.choice(MONITORS)
+        monitors.append({
+            'Manufacturer': monitor_manufacturer, 'Model': monitor_model, 'SerialNumber': f"M{index:05d}{number}{serial[:4]}",
+            'YearOfManufacture': rng.randint(2018, 2024), 'WeekOfManufacture': rng.randint(1, 52),
+            'InstanceName': f"DISPLAY\\FLEET{index}\\{number}", 'ScreenWidth': 527, 'ScreenHeight': 296,
+            'ScreenSizeInches': size, 'IsActive': True, 'IsInternalDisplay': False, 'ConnectionType': 10,
+        })
+    profile = {'inventory': inventory, 'monitors': monitors, 'probes': {}, 'properties': {}}
+    randomize_probes(profile, rng, custom_fields, 1.0)
+    return profile
+
+def randomize_probes(profile, rng, custom_fields, change_rate):
+    # Give a share of the custom fields a new value, like RAM usage or the logged on user changing between runs
+    fields = list(custom_fields.get('custom_fields', {}).values()) + list(custom_fields.get('monitor_fields', {}).get('custom_fields', {}).values())
+    for field in fields:
+        if field.get('ps_command') in profile['probes'] and rng.random() >= change_rate:
+            continue
+        if field.get('float_number'):
+            profile['probes'][field['ps_command']] = round(rng.uniform(1, 64), 1)
+        else:
+            profile['probes'][field['ps_command']] = f"{field.get('name', 'value')} {rng.randrange(10000)}"
+        # Per-monitor fields are answered by the monitor detection
+        target = monitor_property(field['ps_command'])
+        if target:
+            profile['properties'][property_key(*target)] = profile['probes'][field['ps_command']]
+
+class MemoryStore(JsonStore):
+    """A JsonStore which is never read from or written to disk."""
+
+    def load(self):
+        if self.data is None:
+            self.data = {}
+        return self.data
+
+    def save(self):
+        pass
+
+class AgentLocal:
+    """Stands in for the process wide lookup cache, sync state or spool, forwarding to the current agent's own."""
+
+    def __init__(self, local, name):
+        self.local = local
+        self.name = name
+
+    def __getattr__(self, attribute):
+        return getattr(getattr(self.local, self.name), attribute)
+
+class FleetCollector(Collector):
+    """Answers for whichever virtual agent the current worker thread is running.
+
+    Every virtual agent also gets its own lookup cache and sync state in memory and its own
+    spool file, like a real machine has its own files, so one agent never reuses the IDs
+    another looked up or replays the updates another spooled.
+    """
+
+    name = 'fleet'
+
+    def __init__(self):
+        self.local = threading.local()
+        cache._cache = AgentLocal(self.local, 'cache')
+        fingerprint._sync_state = AgentLocal(self.local, 'sync_state')
+        spool._spool = AgentLocal(self.local, 'spool')
+
+    def use(self, profile):
+        if 'cache' not in profile:
+            profile['cache'] = cache.LookupCache()
+            profile['cache'].store = MemoryStore(profile['cache'].store.filename)
+            profile['sync_state'] = fingerprint.SyncState()
+            profile['sync_state'].store = MemoryStore(profile['sync_state'].store.filename)
+            profile['spool'] = spool.Spool(f"pyitagent_spool-{profile['inventory']['hostname']}.jsonl")
+        self.local.profile = profile
+        self.local.cache = profile['cache']
+        self.local.sync_state = profile['sync_state']
+        self.local.spool = profile['spool']
+
+    def inventory(self, fields):
+        inventory = self.local.profile['inventory']
+        return {field: inventory[field] for field in fields if field in inventory}
+
+    def chassis_types(self):
+        return [3]
+
+    def monitors(self, properties=()):
+        values = self.local.profile['properties']
+        return [dict(monitor, Properties={property_key(*target): values.get(property_key(*target)) for target in properties})
+                for monitor in self.local.profile['monitors']]
+
+    def probe(self, cmd, timeout=None):
+        probes = self.local.profile['probes']
+        if cmd not in probes:
+            return ProbeResult(status=1, stderr="Not part of the profile")
+        return ProbeResult(probes[cmd])
+
+    def probes(self, commands, max_workers=4, timeout=None):
+        # The answers are in memory already, no point in a thread pool per agent
+        return [self.probe(command[0] if isinstance(command, tuple) else command) for command in commands]
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(share * len(values) + 0.5)) - 1))]
+
+def endpoint_group(name):
+    # "PATCH hardware/123" and "GET hardware/byserial/ABC" without their ids
+    parts = name.split('/')
+    if 'byserial' in parts:
+        parts = parts[:parts.index('byserial') + 1]
+    return '/'.join(part for part in parts if not part.isdigit())
+
+def run_pass(collector, profiles, workers):
+    """Sync every virtual agent once, returns the wall time and the agents which failed."""
+    from runtime.client import PyITAgent
+
+    def sync(profile):
+        collector.use(profile)
+        try:
+            PyITAgent(async_pipeline=False).sync()
+            return None
+        except Exception as e:
+            return f"{profile['inventory']['hostname']}: {e}"
+
+    started = time.perf_counter()
+    # sys.stdout is process wide, so the agents' output is silenced around the whole pass
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=workers) as executor:
+        failures = [failure for failure in executor.map(sync, profiles) if failure]
+    return time.perf_counter() - started, failures
+
+def report(tracer, wall, agents, failures):
+    requests = tracer.of_kind('request')
+    latencies = [span.duration for span in requests]
+    errors = [span for span in requests if 'error' in span.attributes or span.attributes.get('status', 0) >= 400]
+    print(f"agents={agents} failed={len(failures)} wall={wall:.2f}s requests={len(requests)} "
+          f"rps={len(requests) / wall if wall else 0:.1f} errors={len(errors)} ({100 * len(errors) / max(1, len(requests)):.1f}%)")
+    print(f"latency p50={percentile(latencies, 0.5) * 1000:.1f}ms p90={percentile(latencies, 0.9) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.1f}ms max={max(latencies, default=0) * 1000:.1f}ms")
+
+    by_endpoint = defaultdict(list)
+    for span in requests:
+        by_endpoint[endpoint_group(span.name)].append(span.duration)
+    print(f"{'endpoint':<28}{'count':>8}{'p50':>10}{'p95':>10}")
+    for endpoint, durations in sorted(by_endpoint.items()):
+        print(f"{endpoint:<28}{len(durations):>8}{percentile(durations, 0.5) * 1000:>8.1f}ms{percentile(durations, 0.95) * 1000:>8.1f}ms")
+    for failure in failures[:5]:
+        print(f"  failed: {failure}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a fleet of agents syncing against Snipe-IT')
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16, help='Virtual agents syncing at the same time')
+    parser.add_argument('--mode', choices=['enroll', 'steady'], default='enroll', help='First enrollment, or a re-sync of an enrolled fleet')
+    parser.add_argument('--change-rate', type=float, default=0.2, help='Share of custom fields changing between syncs in steady mode')
+    parser.add_argument('--max-monitors', type=int, default=3)
+    parser.add_argument('--target', help='Snipe-IT API URL, by default an in-process mock server')
+    parser.add_argument('--api-key', default='benchmark')
+    parser.add_argument('--latency', type=float, default=0.01, help='Seconds of latency per request of the mock server')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests the mock server fails with a 503')
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+
+    mock = None
+    target = arguments.target
+    if target is None:
+        mock = MockSnipeIT(latency=arguments.latency, failure_rate=arguments.failure_rate, seed=arguments.seed).start()
+        target = mock.url
+    # Every real agent paces itself, one shared token bucket would throttle the whole fleet instead
+    prepare_workdir(target, {'run_report': 'off'}, {'api_key': arguments.api_key, 'rate_limit': '0', 'max_retries': '2'})
+    reset_local_state()
+
+    from collectors.registry import set_collector
+    from config.settings import get_settings
+    from utils.tracing import reset_tracer
+
+    collector = FleetCollector()
+    set_collector(collector)
+    rng = random.Random(arguments.seed)
+    custom_fields = get_settings().custom_fields
+    profiles = [hardware_profile(index, rng, arguments.max_monitors, custom_fields) for index in range(arguments.agents)]
+
+    if arguments.mode == 'steady':
+        # Enroll the fleet first, then measure the re-sync after some fields changed
+        failure_rate = mock.failure_rate if mock else 0.0
+        if mock:
+            mock.failure_rate = 0.0
+        run_pass(collector, profiles, arguments.workers)
+        if mock:
+            mock.failure_rate = failure_rate
+        for profile in profiles:
+            randomize_probes(profile, rng, custom_fields, arguments.change_rate)
+
+    tracer = reset_tracer()
+    wall, failures = run_pass(collector, profiles, arguments.workers)
+    print(f"mode={arguments.mode} target={target} workers={arguments.workers}")
+    report(tracer, wall, arguments.agents, failures)
+    if mock:
+        mock.stop()
+        # A retried or replayed POST must never create a machine or monitor twice
+        serials = {row['serial'] for row in mock.hardware.values()}
+        print(f"assets={len(mock.hardware)} serials={len(serials)}")
+        if len(mock.hardware) != len(serials):
+            raise SystemExit(f"{len(mock.hardware) - len(serials)} duplicate assets were created")
+
+if __name__ == "__main__":
+    main()
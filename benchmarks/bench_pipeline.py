@@ -0,0 +1,57 @@
+# bench_pipeline.py
+#
+# Compares the wall time of the sequential runtime with the async pipeline against
+# a mock Snipe-IT server with artificial latency.
+#
+#   python -m benchmarks.bench_pipeline --latency 0.05 --monitors 3 --runs 5
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import time
+
+from benchmarks.harness import prepare_workdir, use_fake_powershell, reset_local_state
+from benchmarks.mock_snipeit import MockSnipeIT
+
+def run_once(mock, async_pipeline, enrolled):
+    from runtime.client import PyITAgent
+    if not enrolled:
+        mock.reset()
+        reset_local_state()
+    mock.reset_counters()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        PyITAgent(async_pipeline=async_pipeline).runtime()
+    return time.perf_counter() - started, len(mock.requests)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the sequential runtime with the async pipeline')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of latency per HTTP request')
+    parser.add_argument('--ps-latency', type=float, default=0.02, help='Seconds of latency per PowerShell command')
+    parser.add_argument('--monitors', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=5)
+    arguments = parser.parse_args()
+
+    os.environ['FAKE_PS_MONITORS'] = str(arguments.monitors)
+    os.environ['FAKE_PS_LATENCY'] = str(arguments.ps_latency)
+
+    mock = MockSnipeIT(latency=arguments.latency).start()
+    # No client side pacing, it would dominate the timings
+    prepare_workdir(mock.url, {'lookup_cache_ttl': '0'}, {'rate_limit': '0'})
+    use_fake_powershell()
+
+    print(f"latency={arguments.latency}s ps_latency={arguments.ps_latency}s monitors={arguments.monitors} runs={arguments.runs}")
+    print(f"{'scenario':<22}{'mode':<12}{'median':>10}{'min':>10}{'requests':>10}")
+    for scenario, enrolled in (('first enrollment', False), ('resync (no cache)', True)):
+        for mode, async_pipeline in (('sequential', False), ('async', True)):
+            # Warm up so the PowerShell hosts are started before measuring
+            run_once(mock, async_pipeline, enrolled)
+            timings = [run_once(mock, async_pipeline, enrolled) for _ in range(arguments.runs)]
+            durations = [duration for duration, _ in timings]
+            print(f"{scenario:<22}{mode:<12}{statistics.median(durations):>9.3f}s{min(durations):>9.3f}s{timings[-1][1]:>10}")
+    mock.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# bench_rate_limit.py
+#
+# Runs the agent against a mock Snipe-IT server which throttles like the real one and
+# reports how the retry layer and the token bucket cope with it. Then checks the retry
+# layer against a stub answering 429s: it waits as long as Retry-After or X-RateLimit-Reset
+# ask, counts its retries and throttled time, and gives up after max_retries. Exits
+# non-zero if any check fails, --checks-only skips the table.
+#
+#   python -m benchmarks.bench_rate_limit --server-limit 20 --window 5 --client-limit 240 --runs 3
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from benchmarks.harness import prepare_workdir, use_fake_powershell, reset_local_state
+from benchmarks.mock_snipeit import MockSnipeIT
+
+def configure(mock, **server):
+    # A fresh config.ini for this stub, without the token bucket so only the retry layer waits
+    from config.settings import reload_settings
+    prepare_workdir(mock.url, {'lookup_cache_ttl': '0'}, dict({'rate_limit': '0', 'backoff_base': '0.01', 'backoff_max': '0.05'}, **server))
+    reload_settings()
+
+def stats_since(before):
+    from api.handler import get_request_stats
+    after = get_request_stats()
+    return {key: after[key] - before[key] for key in after}
+
+def check_retry_after(problems):
+    """A 429 with Retry-After: 2 is retried once, after waiting those 2 seconds."""
+    from api.handler import send_request, get_request_stats
+    mock = MockSnipeIT(rate_limit=1, window=2.0).start()
+    configure(mock, max_retries='2')
+    try:
+        # Uses up the only request of the window
+        send_request('GET', 'manufacturers?name=Retry-After')
+        before = get_request_stats()
+        started = time.monotonic()
+        send_request('GET', 'manufacturers?name=Retry-After')
+        waited = time.monotonic() - started
+        delta = stats_since(before)
+    except Exception as e:
+        problems.append(f"Retry-After: the request failed: {e}")
+        return
+    finally:
+        mock.stop()
+    print(f"Retry-After: waited {waited:.2f}s, {delta['rate_limited']} 429s, {delta['retries']} retries, {delta['throttled_seconds']:.2f}s throttled")
+    if delta['requests'] != 2 or delta['rate_limited'] != 1 or delta['retries'] != 1:
+        problems.append(f"Retry-After: expected 2 requests, 1 429 and 1 retry, counted {delta['requests']}, {delta['rate_limited']} and {delta['retries']}")
+    if delta['throttled_seconds'] < 2.0 or waited < 2.0:
+        problems.append(f"Retry-After: asked to wait 2s, throttled {delta['throttled_seconds']:.2f}s and took {waited:.2f}s")
+    if len(mock.requests) != 3:
+        problems.append(f"Retry-After: the stub received {len(mock.requests)} requests, expected 3")
+
+def check_rate_limit_reset(problems):
+    """Without Retry-After the agent waits until X-RateLimit-Reset, backing off alone would give up long before."""
+    from api.handler import send_request, get_request_stats
+    mock = MockSnipeIT(rate_limit=1, window=2.0, retry_after=False).start()
+    configure(mock, max_retries='3')
+    try:
+        send_request('GET', 'manufacturers?name=X-RateLimit-Reset')
+        before = get_request_stats()
+        started = time.monotonic()
+        send_request('GET', 'manufacturers?name=X-RateLimit-Reset')
+        waited = time.monotonic() - started
+        delta = stats_since(before)
+    except Exception as e:
+        problems.append(f"X-RateLimit-Reset: the request failed, the reset wasn't waited for: {e}")
+        return
+    finally:
+        mock.stop()
+    print(f"X-RateLimit-Reset: waited {waited:.2f}s, {delta['rate_limited']} 429s, {delta['retries']} retries, {delta['throttled_seconds']:.2f}s throttled")
+    # The reset is a whole second, the agent may come back just before it and wait once more
+    if delta['rate_limited'] < 1 or delta['retries'] != delta['rate_limited'] or delta['requests'] != delta['rate_limited'] + 1:
+        problems.append(f"X-RateLimit-Reset: counted {delta['requests']} requests, {delta['rate_limited']} 429s and {delta['retries']} retries")
+    if delta['throttled_seconds'] < 1.0:
+        problems.append(f"X-RateLimit-Reset: throttled only {delta['throttled_seconds']:.2f}s before the window reset")
+
+def check_max_retries(problems):
+    """A server which keeps answering 429 gets max_retries + 1 attempts, then send_request raises."""
+    from api.handler import send_request, get_request_stats
+    mock = MockSnipeIT().start()
+    configure(mock, max_retries='2')
+    mock.fail_next(10, 429)
+    before = get_request_stats()
+    try:
+        send_request('GET', 'manufacturers?name=max_retries')
+        problems.append("max_retries: send_request returned instead of raising")
+    except Exception as e:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+        if status != 429:
+            problems.append(f"max_retries: expected an HTTP 429 error, got {e!r}")
+    finally:
+        mock.stop()
+    delta = stats_since(before)
+    print(f"max_retries=2: {len(mock.requests)} attempts, {delta['rate_limited']} 429s, {delta['retries']} retries")
+    if len(mock.requests) != 3 or delta['requests'] != 3 or delta['rate_limited'] != 3 or delta['retries'] != 2:
+        problems.append(f"max_retries: expected 3 attempts, 3 429s and 2 retries, counted {len(mock.requests)}, {delta['rate_limited']} and {delta['retries']}")
+
+def run_checks():
+    problems = []
+    for check in (check_retry_after, check_rate_limit_reset, check_max_retries):
+        check(problems)
+    if problems:
+        raise SystemExit("Retry checks failed:\n" + "\n".join(problems))
+    print("Retry checks ok")
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the agent against a rate limited Snipe-IT server')
+    parser.add_argument('--server-limit', type=int, default=20, help='Requests the server answers per window')
+    parser.add_argument('--window', type=float, default=5.0, help='Length of the server rate limit window in seconds')
+    parser.add_argument('--client-limit', type=int, default=240, help='rate_limit of the agent in requests per minute, 0 disables the token bucket')
+    parser.add_argument('--monitors', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--checks-only', action='store_true', help='Only run the retry checks')
+    arguments = parser.parse_args()
+
+    if arguments.checks_only:
+        return run_checks()
+
+    os.environ['FAKE_PS_MONITORS'] = str(arguments.monitors)
+
+    mock = MockSnipeIT(rate_limit=arguments.server_limit, window=arguments.window).start()
+    prepare_workdir(mock.url, {'lookup_cache_ttl': '0'}, {'rate_limit': str(arguments.client_limit), 'backoff_base': '0.2'})
+    use_fake_powershell()
+
+    from api.handler import get_request_stats
+    from runtime.client import PyITAgent
+
+    print(f"server_limit={arguments.server_limit}/{arguments.window}s client_limit={arguments.client_limit}/min monitors={arguments.monitors}")
+    print(f"{'run':<6}{'wall':>9}{'requests':>10}{'429s':>7}{'retries':>9}{'throttled':>11}")
+    for run in range(arguments.runs):
+        mock.reset()
+        reset_local_state()
+        before = get_request_stats()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            PyITAgent().runtime()
+        wall = time.perf_counter() - started
+        after = get_request_stats()
+        delta = {key: after[key] - before[key] for key in after}
+        print(f"{run + 1:<6}{wall:>8.2f}s{delta['requests']:>10}{mock.rate_limited:>7}{delta['retries']:>9}{delta['throttled_seconds']:>10.2f}s")
+    mock.stop()
+    print()
+    run_checks()
+
+if __name__ == "__main__":
+    main()
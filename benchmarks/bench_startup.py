@@ -0,0 +1,148 @@
+# bench_startup.py
+#
+# Measures how long the agent takes from launch to its first PowerShell command, for main.py
+# or a built executable, against the mock Snipe-IT server and the fake PowerShell. The time
+# comes from the run report: its 'started' plus the start of the first 'command' span. Then
+# lists the modules main.py spends the most time importing, from python -X importtime.
+#
+#   python -m benchmarks.bench_startup --runs 5
+#   python -m benchmarks.bench_startup --exe dist\PyITAgent\PyITAgent.exe
+#
+# A frozen agent reads config.ini next to the executable, so with --exe the benchmark config
+# is copied into its folder for the duration of the runs and the original put back after.
+
+import argparse
+import configparser
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.harness import ROOT, FAKE_POWERSHELL, prepare_workdir
+from benchmarks.mock_snipeit import MockSnipeIT
+
+CONFIG_FILES = ('config.ini', 'custom_fields.json')
+
+def parse_importtime(stderr):
+    """Parse the -X importtime lines into [(module, self us, cumulative us, depth)], in import order."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return modules
+
+def import_times(code='import main', cwd=ROOT):
+    """Import times of `code` in a fresh interpreter, run from the repository root."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"'{code}' failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def startup_modules(cwd=ROOT):
+    """Modules the bare interpreter imports before running anything, eg. site and .pth hooks."""
+    return {name for name, _, _, _ in import_times('pass', cwd)}
+
+def powershell_command():
+    command = [sys.executable, FAKE_POWERSHELL]
+    # utils.powershell splits PYITAGENT_POWERSHELL in the native style of the platform
+    return subprocess.list2cmdline(command) if os.name == 'nt' else shlex.join(command)
+
+def launch(command, workdir):
+    """Run the agent once and return (launch -> first PowerShell command, launch -> exit) in seconds."""
+    report_path = os.path.join(workdir, 'pyitagent_report.json')
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    environment = dict(os.environ, PYITAGENT_POWERSHELL=powershell_command())
+    launched = time.time()
+    result = subprocess.run(command, cwd=workdir, env=environment, capture_output=True, text=True)
+    exited = time.time() - launched
+    if not os.path.exists(report_path):
+        raise SystemExit(f"The agent wrote no run report (exit code {result.returncode}):\n{(result.stdout + result.stderr)[-2000:]}")
+    with open(report_path, 'r') as file:
+        report = json.load(file)
+    commands = [span for span in report['spans'] if span['kind'] == 'command']
+    if not commands:
+        return None, exited
+    started = datetime.fromisoformat(report['started']).timestamp()
+    return started + min(span['start'] for span in commands) - launched, exited
+
+def install_config(workdir, exe_dir):
+    """Copy the benchmark config next to the executable, returning the backups to restore."""
+    backups = {}
+    for name in CONFIG_FILES:
+        target = os.path.join(exe_dir, name)
+        if os.path.exists(target):
+            backups[target] = target + '.bench-backup'
+            shutil.move(target, backups[target])
+        shutil.copy(os.path.join(workdir, name), target)
+    return backups
+
+def restore_config(exe_dir, backups):
+    for name in CONFIG_FILES:
+        target = os.path.join(exe_dir, name)
+        if os.path.exists(target):
+            os.remove(target)
+        if target in backups:
+            shutil.move(backups[target], target)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure launch to first PowerShell command and the import time of main.py')
+    parser.add_argument('--exe', metavar='PATH', help='Built executable to launch instead of main.py')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=20, help='Number of modules in the import time table')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency per HTTP request')
+    arguments = parser.parse_args()
+
+    os.environ['FAKE_PS_STARTUP'] = os.environ.get('FAKE_PS_STARTUP', '0')
+    mock = MockSnipeIT(latency=arguments.latency).start()
+    workdir = prepare_workdir(mock.url, {'run_report': 'on'}, {'rate_limit': '0', 'max_retries': '0'})
+    # Keep the run report and the rest of the local state in the scratch directory, frozen or not
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    config['GENERAL']['state_directory'] = workdir
+    with open('config.ini', 'w') as file:
+        config.write(file)
+
+    if arguments.exe:
+        command = [os.path.abspath(arguments.exe)]
+        exe_dir = os.path.dirname(command[0])
+        backups = install_config(workdir, exe_dir)
+    else:
+        command = [sys.executable, os.path.join(ROOT, 'main.py')]
+    try:
+        samples = [launch(command, workdir) for _ in range(arguments.runs)]
+    finally:
+        if arguments.exe:
+            restore_config(exe_dir, backups)
+        mock.stop()
+
+    first = [sample[0] for sample in samples if sample[0] is not None]
+    print(f"{'launch':<40}{' '.join(command)}")
+    if first:
+        print(f"{'launch -> first PowerShell command':<40}{statistics.median(first) * 1000:>8.0f}ms median, {min(first) * 1000:.0f}ms best of {len(first)}")
+    else:
+        print(f"{'launch -> first PowerShell command':<40}{'no command was run':>8}")
+    print(f"{'launch -> exit':<40}{statistics.median(sample[1] for sample in samples) * 1000:>8.0f}ms median")
+
+    baseline = startup_modules()
+    modules = [module for module in import_times() if module[0] not in baseline]
+    total = next((cumulative for name, _, cumulative, depth in modules if name == 'main' and depth == 0), 0)
+    print(f"\nimport main: {total / 1000:.1f}ms over {len(modules)} modules")
+    print(f"{'module':<44}{'self':>10}{'cumulative':>12}")
+    for name, own, cumulative, _ in sorted(modules, key=lambda module: module[2], reverse=True)[:arguments.top]:
+        print(f"{name:<44}{own / 1000:>8.1f}ms{cumulative / 1000:>10.1f}ms")
+
+if __name__ == "__main__":
+    main()
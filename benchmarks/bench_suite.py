@@ -0,0 +1,138 @@
+# bench_suite.py
+#
+# End-to-end benchmark of PyITAgent.runtime() against the mock Snipe-IT server and the
+# fake PowerShell. Every scenario runs in a fresh interpreter so its peak RSS and process
+# spawns are its own, and reports wall time, HTTP requests, spawns and peak RSS. 'failures'
+# counts the injected failures of the last run, 'aborted' the runs which ended in an exception.
+#
+#   python -m benchmarks.bench_suite --latency 0.02 --monitors 0 2 6 --runs 3
+#   python -m benchmarks.bench_suite --failure-rate 0.1
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import ROOT, prepare_workdir, use_fake_powershell, reset_local_state
+from benchmarks.mock_snipeit import MockSnipeIT
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is reported as unknown there
+    resource = None
+
+# Scenario -> whether the machine is already enrolled and its local cache warm
+SCENARIOS = {
+    'first enrollment': 'enroll',
+    'steady state': 'steady',
+    'resync (no cache)': 'resync',
+}
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_scenario(mode, arguments):
+    """Run one scenario in this process and return its measurements."""
+    os.environ['FAKE_PS_MONITORS'] = str(arguments.monitors)
+    os.environ['FAKE_PS_LATENCY'] = str(arguments.ps_latency)
+    os.environ['FAKE_PS_STARTUP'] = str(arguments.ps_startup)
+
+    mock = MockSnipeIT(latency=arguments.latency, failure_rate=arguments.failure_rate, seed=arguments.seed).start()
+    prepare_workdir(mock.url, {'async_pipeline': 'on' if arguments.async_pipeline else 'off'}, {'rate_limit': '0', 'max_retries': '0'})
+    pool = use_fake_powershell()
+
+    from runtime.client import PyITAgent
+
+    def run():
+        # With injected failures a run may abort, like it would end up in the ExceptionHandler
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                PyITAgent().runtime()
+            return 0
+        except Exception:
+            return 1
+
+    timings = []
+    for _ in range(arguments.runs):
+        mock.reset()
+        reset_local_state()
+        if mode != 'enroll':
+            # Enroll the machine first, without failures, then measure the run after it
+            failure_rate, mock.failure_rate = mock.failure_rate, 0.0
+            run()
+            mock.failure_rate = failure_rate
+            if mode == 'resync':
+                reset_local_state()
+        mock.reset_counters()
+        # Every measured run starts without PowerShell sessions, like a scheduled run would
+        pool.stop()
+        spawns = pool.spawn_count()
+        started = time.perf_counter()
+        errors = run()
+        timings.append({
+            'wall': time.perf_counter() - started,
+            'errors': errors,
+            'requests': len(mock.requests),
+            'failures': mock.failures,
+            'spawns': pool.spawn_count() - spawns,
+        })
+    mock.stop()
+
+    return {
+        'wall': statistics.median(timing['wall'] for timing in timings),
+        'requests': timings[-1]['requests'],
+        'failures': timings[-1]['failures'],
+        'aborted': sum(timing['errors'] for timing in timings),
+        'spawns': timings[-1]['spawns'],
+        'peak_rss': peak_rss_mb(),
+    }
+
+def spawn_scenario(mode, monitors, arguments):
+    # A fresh interpreter per scenario, so peak RSS and spawns aren't shared between them
+    command = [sys.executable, '-m', 'benchmarks.bench_suite', '--worker', mode, '--monitors', str(monitors),
+               '--runs', str(arguments.runs), '--latency', str(arguments.latency), '--ps-latency', str(arguments.ps_latency),
+               '--ps-startup', str(arguments.ps_startup), '--failure-rate', str(arguments.failure_rate), '--seed', str(arguments.seed)]
+    if arguments.async_pipeline:
+        command.append('--async')
+    output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of the agent against a mock Snipe-IT server')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds of latency per HTTP request')
+    parser.add_argument('--ps-latency', type=float, default=0.01, help='Seconds of latency per PowerShell command')
+    parser.add_argument('--ps-startup', type=float, default=0.3, help='Seconds it takes to start a PowerShell session')
+    parser.add_argument('--monitors', type=int, nargs='+', default=[0, 1, 2, 4, 6])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--async', dest='async_pipeline', action='store_true', help='Use the async pipeline')
+    parser.add_argument('--worker', choices=list(SCENARIOS.values()), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        arguments.monitors = arguments.monitors[0]
+        print(json.dumps(run_scenario(arguments.worker, arguments)))
+        return
+
+    print(f"latency={arguments.latency}s ps_latency={arguments.ps_latency}s ps_startup={arguments.ps_startup}s "
+          f"failure_rate={arguments.failure_rate} runs={arguments.runs} async={arguments.async_pipeline}")
+    print(f"{'scenario':<20}{'monitors':>9}{'wall':>10}{'requests':>10}{'failures':>10}{'aborted':>9}{'spawns':>8}{'peak rss':>11}")
+    for scenario, mode in SCENARIOS.items():
+        for monitors in arguments.monitors:
+            result = spawn_scenario(mode, monitors, arguments)
+            rss = f"{result['peak_rss']:.1f}MB" if result['peak_rss'] is not None else 'n/a'
+            print(f"{scenario:<20}{monitors:>9}{result['wall']:>9.3f}s{result['requests']:>10}{result['failures']:>10}{result['aborted']:>9}{result['spawns']:>8}{rss:>11}")
+
+if __name__ == "__main__":
+    main()
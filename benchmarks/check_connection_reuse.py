@@ -0,0 +1,51 @@
+# check_connection_reuse.py
+#
+# Regression check for the keep-alive session of api.handler: a sequential run against the
+# mock Snipe-IT server must send all of its requests over one connection, and a second run
+# in the same process, like a daemon cycle, must keep using it. Exits non-zero when it doesn't.
+#
+#   python -m benchmarks.check_connection_reuse --monitors 3
+
+import argparse
+import contextlib
+import io
+import os
+
+from benchmarks.harness import prepare_workdir, use_fake_powershell, reset_local_state
+from benchmarks.mock_snipeit import MockSnipeIT
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the agent sends all of its requests over one connection')
+    parser.add_argument('--monitors', type=int, default=2)
+    arguments = parser.parse_args()
+
+    os.environ['FAKE_PS_MONITORS'] = str(arguments.monitors)
+    os.environ['FAKE_PS_STARTUP'] = '0'
+    mock = MockSnipeIT().start()
+    prepare_workdir(mock.url, {'async_pipeline': 'off', 'run_report': 'off'}, {'rate_limit': '0', 'max_retries': '0'})
+    use_fake_powershell()
+    reset_local_state()
+
+    from runtime.client import PyITAgent
+
+    problems = []
+    # The first run enrolls the machine and opens the connection, the second (without the local
+    # cache, so it looks everything up again) must keep using it without opening another
+    for name, expected in (('enrollment', 1), ('second run', 0)):
+        mock.reset_counters()
+        with contextlib.redirect_stdout(io.StringIO()):
+            PyITAgent().runtime()
+        print(f"{name:<12}{len(mock.requests):>4} requests, {mock.connections} new connection(s)")
+        if len(mock.requests) < 2:
+            problems.append(f"the {name} sent {len(mock.requests)} requests, too few to tell")
+        elif mock.connections != expected:
+            problems.append(f"the {name} opened {mock.connections} connections for {len(mock.requests)} requests, expected {expected}")
+        reset_local_state()
+    mock.stop()
+
+    if problems:
+        raise SystemExit("Connections aren't reused: " + ", ".join(problems))
+    print("ok")
+
+if __name__ == "__main__":
+    main()
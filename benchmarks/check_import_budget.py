@@ -0,0 +1,68 @@
+# check_import_budget.py
+#
+# Regression check for the startup of a run with nothing to do: main.py --schedule on a host
+# which synced a minute ago. That run must skip the sync, never load the modules only a sync
+# needs, and spend less than the budget importing. Exits non-zero when it doesn't.
+#
+#   python -m benchmarks.check_import_budget --budget 60
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_startup import parse_importtime, powershell_command, startup_modules
+from benchmarks.harness import ROOT, prepare_workdir
+
+# Modules a skipped run has no business importing
+FORBIDDEN = ['requests', 'urllib3', 'asyncio', 'api.slack', 'api.handler', 'runtime.client', 'models.assets.manager']
+
+def importtime(arguments, cwd):
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=cwd, capture_output=True, text=True,
+                            env=dict(os.environ, PYITAGENT_POWERSHELL=powershell_command()))
+    return result, parse_importtime(result.stderr)
+
+def own_import_time(modules, baseline):
+    # Top level imports in microseconds, leaving out those the bare interpreter does at startup too
+    return sum(cumulative for name, _, cumulative, depth in modules if depth == 0 and name not in baseline)
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that a run skipped by the scheduler starts within an import time budget')
+    parser.add_argument('--budget', type=float, default=60.0, help='Milliseconds the skipped run may spend importing')
+    parser.add_argument('--runs', type=int, default=3, help='The best of this many runs is compared to the budget')
+    arguments = parser.parse_args()
+
+    # Nothing listens on the site, a skipped run must not send a single request
+    workdir = prepare_workdir('http://127.0.0.1:9/api/v1', {'scheduled': 'on', 'schedule_window': '0', 'run_report': 'on'})
+    with open(os.path.join(workdir, 'pyitagent_schedule.json'), 'w') as file:
+        json.dump({'last_sync': time.time() - 60}, file)
+
+    baseline = startup_modules(workdir)
+
+    problems = []
+    totals = []
+    for _ in range(arguments.runs):
+        result, modules = importtime([os.path.join(ROOT, 'main.py'), '--schedule'], workdir)
+        if result.returncode != 0 or 'skipping this run' not in result.stdout:
+            raise SystemExit(f"The run wasn't skipped (exit code {result.returncode}):\n{(result.stdout + result.stderr)[-2000:]}")
+        totals.append(own_import_time(modules, baseline))
+    imported = {name for name, _, _, _ in modules}
+    problems += [f"imports {name}" for name in FORBIDDEN if name in imported]
+    if os.path.exists(os.path.join(workdir, 'pyitagent_report.json')):
+        problems.append("wrote a run report, so it ran the agent")
+
+    best = min(totals) / 1000
+    print(f"skipped run: {best:.1f}ms importing {len(imported - baseline)} modules (budget {arguments.budget:.0f}ms, best of {arguments.runs})")
+    if best > arguments.budget:
+        problems.append(f"spent {best:.1f}ms importing, over the {arguments.budget:.0f}ms budget")
+    for name, _, cumulative, _ in sorted((module for module in modules if module[3] == 0 and module[0] not in baseline),
+                                          key=lambda module: module[2], reverse=True)[:10]:
+        print(f"  {name:<40}{cumulative / 1000:>8.1f}ms")
+    if problems:
+        raise SystemExit("The skipped run " + ", ".join(problems))
+    print("ok")
+
+if __name__ == "__main__":
+    main()
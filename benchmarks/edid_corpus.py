@@ -0,0 +1,153 @@
+# edid_corpus.py
+#
+# Builds the synthetic EDID/DisplayID corpus in benchmarks/fixtures/edid, one .bin per
+# monitor plus corpus.json with the values collectors.edid is expected to decode from it.
+# The blobs are synthetic but laid out like the real monitors they are named after.
+#
+#   python -m benchmarks.edid_corpus
+
+import json
+import os
+
+from benchmarks.harness import ROOT
+
+CORPUS_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures', 'edid')
+
+def encode_pnp(code):
+    value = 0
+    for letter in code:
+        value = (value << 5) | (ord(letter) - 64)
+    return value.to_bytes(2, 'big')
+
+def checksum(block):
+    return bytes(block[:-1]) + bytes([-sum(block[:-1]) % 256])
+
+def display_descriptor(tag, value):
+    data = value.encode('ascii')
+    data = data + b'\x0a' + b' ' * (12 - len(data)) if len(data) < 13 else data[:13]
+    return b'\x00\x00\x00' + bytes([tag, 0]) + data
+
+def detailed_timing(clock_khz, h_active, h_blank, v_active, v_blank, width_mm, height_mm):
+    return bytes([
+        (clock_khz // 10) & 0xFF, (clock_khz // 10) >> 8,
+        h_active & 0xFF, h_blank & 0xFF, (h_active >> 8) << 4 | (h_blank >> 8),
+        v_active & 0xFF, v_blank & 0xFF, (v_active >> 8) << 4 | (v_blank >> 8),
+        48, 32, 0x35, 0,
+        width_mm & 0xFF, height_mm & 0xFF, (width_mm >> 8) << 4 | (height_mm >> 8),
+        0, 0, 0x1E,
+    ])
+
+def build_edid(manufacturer, product_code, serial_number=0, week=1, year=2020, revision=3, video_input=0x80,
+               size_cm=(0, 0), timing=None, descriptors=(), extensions=()):
+    base = bytearray(128)
+    base[0:8] = b'\x00\xff\xff\xff\xff\xff\xff\x00'
+    base[8:10] = encode_pnp(manufacturer)
+    base[10:12] = product_code.to_bytes(2, 'little')
+    base[12:16] = serial_number.to_bytes(4, 'little')
+    base[16] = week
+    base[17] = year - 1990
+    base[18:20] = bytes([1, revision])
+    base[20] = video_input
+    base[21:23] = bytes(size_cm)
+    base[23:25] = bytes([120, 0x0A])
+    slots = ([detailed_timing(*timing)] if timing else []) + [display_descriptor(tag, value) for tag, value in descriptors]
+    for index in range(4):
+        # Unused slots are dummy descriptors
+        slot = slots[index] if index < len(slots) else b'\x00\x00\x00\x10' + b'\x00' * 14
+        base[54 + index * 18:72 + index * 18] = slot
+    base[126] = len(extensions)
+    return checksum(base) + b"".join(checksum(bytearray(block)) for block in extensions)
+
+def displayid_block(tag, payload, revision=0):
+    return bytes([tag, revision, len(payload)]) + payload
+
+def displayid_timing(clock_khz, h_active, h_blank, v_active, v_blank, preferred=True, clock_unit_khz=10):
+    return ((clock_khz // clock_unit_khz) - 1).to_bytes(3, 'little') + bytes([0x80 if preferred else 0]) + b"".join(
+        (value - 1).to_bytes(2, 'little') for value in (h_active, h_blank, 48, 32, v_active, v_blank, 3, 5))
+
+def displayid_section(version, blocks, size=None):
+    body = b"".join(blocks)
+    section = bytes([version, len(body), 0, 0]) + body
+    section += bytes([-sum(section) % 256])
+    return section + b'\x00' * ((size or len(section)) - len(section))
+
+def displayid_extension(blocks):
+    # 0x70 followed by a DisplayID section padded out to the block checksum
+    return b'\x70' + displayid_section(0x13, blocks, 126) + b'\x00'
+
+def cea_extension():
+    return b'\x02\x03\x04\x00' + b'\x00' * 124
+
+def corpus():
+    """Name -> (blob, expected values)."""
+    entries = {}
+    entries['dell-p2419h'] = (build_edid(
+        'DEL', 0xA0F1, week=12, year=2021, video_input=0x80, size_cm=(53, 30),
+        timing=(148500, 1920, 280, 1080, 45, 527, 296),
+        descriptors=[(0xFF, 'CFV9N0001'), (0xFC, 'DELL P2419H'), (0xFD, '')],
+    ), {'version': '1.3', 'manufacturer': 'DEL', 'product_code': 0xA0F1, 'serial': 'CFV9N0001', 'name': 'DELL P2419H',
+        'week': 12, 'year': 2021, 'digital': True, 'width_mm': 527, 'height_mm': 296,
+        'preferred_timing': {'width': 1920, 'height': 1080, 'pixel_clock_khz': 148500, 'refresh_hz': 60.0,
+                             'line_us': 14.815, 'frame_us': 16666.7}})
+    entries['lg-27gl850'] = (build_edid(
+        'GSM', 0x5B7F, serial_number=0x0001A2B3, week=0xFF, year=2019, revision=4, video_input=0xB5, size_cm=(60, 34),
+        timing=(241500, 2560, 160, 1440, 41, 597, 336),
+        descriptors=[(0xFC, 'LG ULTRAGEAR'), (0xFD, '')],
+        extensions=[cea_extension()],
+    ), {'version': '1.4', 'manufacturer': 'GSM', 'serial': None, 'serial_number': 0x0001A2B3, 'model_year': True, 'week': None,
+        'year': 2019, 'interface': 'DisplayPort', 'width_mm': 597, 'height_mm': 336, 'extensions': 1,
+        'preferred_timing': {'width': 2560, 'height': 1440, 'pixel_clock_khz': 241500}})
+    entries['boe-nv156fhm'] = (build_edid(
+        'BOE', 0x0868, week=20, year=2020, revision=4, video_input=0xA5, size_cm=(34, 19),
+        timing=(141000, 1920, 160, 1080, 32, 344, 194),
+        descriptors=[(0xFE, 'BOE HF'), (0xFE, 'NV156FHM-N61')],
+    ), {'version': '1.4', 'manufacturer': 'BOE', 'name': None, 'serial': None, 'serial_number': None, 'text': ['BOE HF', 'NV156FHM-N61'],
+        'interface': 'DisplayPort', 'width_mm': 344, 'height_mm': 194})
+    entries['samsung-tv-hdmi'] = (build_edid(
+        'SAM', 0x0E0F, serial_number=0x01000E00, week=1, year=2018, video_input=0x80, size_cm=(160, 90),
+        timing=(148500, 1920, 280, 1080, 45, 1600, 900),
+        descriptors=[(0xFC, 'SAMSUNG'), (0xFD, '')],
+        extensions=[cea_extension()],
+    ), {'manufacturer': 'SAM', 'name': 'SAMSUNG', 'serial_number': 0x01000E00, 'width_mm': 1600, 'height_mm': 900, 'extensions': 1})
+    entries['dell-up3218k-displayid'] = (build_edid(
+        'DEL', 0x4146, week=30, year=2017, revision=4, video_input=0xB5, size_cm=(70, 39),
+        timing=(533250, 3840, 160, 2160, 62, 698, 393),
+        descriptors=[(0xFF, 'PXJ8K0007'), (0xFC, 'DELL UP3218K')],
+        extensions=[displayid_extension([
+            displayid_block(0x00, b'DEL' + (0x4146).to_bytes(2, 'little') + (7).to_bytes(4, 'little') + bytes([30, 17, 12]) + b'DELL UP3218K'),
+            displayid_block(0x01, (6980).to_bytes(2, 'little') + (3930).to_bytes(2, 'little') + (7680).to_bytes(2, 'little') + (4320).to_bytes(2, 'little')),
+            displayid_block(0x03, displayid_timing(2033640, 7680, 160, 4320, 93)),
+        ])],
+    ), {'manufacturer': 'DEL', 'serial': 'PXJ8K0007', 'name': 'DELL UP3218K', 'width_mm': 698, 'height_mm': 393,
+        'preferred_timing': {'width': 7680, 'height': 4320, 'pixel_clock_khz': 2033640}})
+    entries['acer-al1916w-analog'] = (build_edid(
+        'ACR', 0x0058, serial_number=0x74600BC2, week=0, year=2008, video_input=0x0E, size_cm=(41, 26),
+        timing=(106500, 1440, 464, 900, 34, 408, 255),
+        descriptors=[(0xFF, 'L70080024221'), (0xFC, 'Acer AL1916W')],
+    ), {'manufacturer': 'ACR', 'week': None, 'year': 2008, 'digital': False, 'interface': None, 'serial': 'L70080024221',
+        'preferred_timing': {'width': 1440, 'height': 900}})
+    bad_checksum = bytearray(entries['dell-p2419h'][0])
+    bad_checksum[127] ^= 0xFF
+    entries['bad-checksum'] = (bytes(bad_checksum), {'checksum_ok': False, 'name': 'DELL P2419H'})
+    entries['truncated'] = (entries['dell-p2419h'][0][:100], {'error': 'EdidError'})
+    entries['displayid2-panel'] = (displayid_section(0x20, [
+        displayid_block(0x20, bytes.fromhex('00E04C') + (0x8A1C).to_bytes(2, 'little') + (0).to_bytes(4, 'little') + bytes([8, 23, 0])),
+        displayid_block(0x21, (3020).to_bytes(2, 'little') + (1890).to_bytes(2, 'little') + (2880).to_bytes(2, 'little') + (1800).to_bytes(2, 'little')),
+        displayid_block(0x22, displayid_timing(694000, 2880, 80, 1800, 90, clock_unit_khz=1)),
+    ]), {'kind': 'displayid', 'version': '2.0', 'manufacturer': '00E04C', 'product_code': 0x8A1C, 'year': 2023,
+         'width_mm': 302, 'height_mm': 189, 'preferred_timing': {'width': 2880, 'height': 1800, 'pixel_clock_khz': 694000}})
+    return entries
+
+def main():
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    expected = {}
+    for name, (blob, values) in corpus().items():
+        with open(os.path.join(CORPUS_DIR, f"{name}.bin"), 'wb') as file:
+            file.write(blob)
+        expected[name] = values
+    with open(os.path.join(CORPUS_DIR, 'corpus.json'), 'w') as file:
+        json.dump(expected, file, indent=4)
+    print(f"Wrote {len(expected)} blobs to {CORPUS_DIR}")
+
+if __name__ == "__main__":
+    main()
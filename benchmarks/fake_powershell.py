@@ -0,0 +1,94 @@
+# fake_powershell.py
+#
+# Speaks the same line protocol as utils.powershell.PowerShellHost, but answers
+# with canned data so the agent can be run and benchmarked without Windows.
+# Tunable through the environment:
+#   FAKE_PS_STARTUP   seconds to sleep on startup (mimics powershell.exe start)
+#   FAKE_PS_LATENCY   seconds to sleep per command (mimics WMI queries)
+#   FAKE_PS_MONITORS  number of external monitors to report
+
+import base64
+import json
+import os
+import re
+import sys
+import time
+
+INVENTORY = {
+    'manufacturer': 'Dell Inc.',
+    'model': 'OptiPlex 7090',
+    'model_number': '0ABC12',
+    'serial_number': 'CN0ABC12/SVC1234',
+    'hostname': 'BENCH-PC01',
+    'mac_address': '00:11:22:33:44:55',
+    'disks': [
+        {'media_type': 'Fixed hard disk media', 'model': 'PC SN730 NVMe WDC 512GB', 'serial': 'E823_8FA6_BF53_0001.', 'size': 512105932800},
+        {'media_type': 'Removable Media', 'model': 'USB Flash Disk', 'serial': '0123456789', 'size': 15728640000},
+    ],
+    'volumes': [
+        {'device_id': 'C:', 'size': 511101681664, 'free': 294887559168},
+    ],
+}
+
+# The synthetic Dell P2419H from the EDID corpus, every fake monitor gets its own serial
+EDID_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'edid', 'dell-p2419h.bin')
+
+def edid(index):
+    with open(EDID_TEMPLATE, 'rb') as file:
+        blob = bytearray(file.read())
+    # The serial string is the display descriptor in the second slot
+    serial = f'CFV9N{index:04d}'.encode('ascii')
+    blob[77:90] = serial + b'\x0a' + b' ' * (12 - len(serial))
+    blob[127] = -sum(blob[:127]) % 256
+    return base64.b64encode(bytes(blob)).decode('ascii')
+
+def monitors(count, properties=()):
+    return [{
+        'InstanceName': f'DISPLAY\\DELA0F{index}\\5&1a2b3c4d&0&UID{index}_0',
+        'IsActive': True,
+        'ConnectionType': 10,
+        'Edid': edid(index),
+        'MaxHorizontalImageSize': 53,
+        'MaxVerticalImageSize': 30,
+        'Properties': {f"{wmi_class}.{property_name}": 53 if property_name == 'MaxHorizontalImageSize' else 'Fake value'
+                       for wmi_class, property_name in properties},
+    } for index in range(count)]
+
+def answer(cmd):
+    if "$result['manufacturer']" in cmd:
+        return INVENTORY
+    if 'WmiMonitorID' in cmd:
+        properties = re.findall(r"@\{ Class = '(\w+)'; Property = '(\w+)' \}", cmd)
+        return monitors(int(os.environ.get('FAKE_PS_MONITORS', '2')), properties)
+    if 'ChassisTypes' in cmd:
+        return [3]
+    if 'WindowsIdentity' in cmd:
+        return 'BENCH\\user'
+    if 'Round' in cmd:
+        return 15.9
+    return 'Fake value'
+
+def render(cmd):
+    value = answer(cmd)
+    # Probes ask for their output as JSON, plain commands get it as text
+    if cmd.rstrip().endswith('ConvertTo-Json -Compress -Depth 4'):
+        return json.dumps(value)
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return str(value)
+
+def main():
+    time.sleep(float(os.environ.get('FAKE_PS_STARTUP', '0')))
+    latency = float(os.environ.get('FAKE_PS_LATENCY', '0'))
+    for line in sys.stdin:
+        command = re.search(r"FromBase64String\('([^']*)'\)", line)
+        marker = re.search(r"\[Console\]::Error\.WriteLine\('([^']+)'\)", line)
+        if not command or not marker:
+            continue
+        time.sleep(latency)
+        print(render(base64.b64decode(command.group(1)).decode('utf-8')))
+        print(marker.group(1), file=sys.stderr, flush=True)
+        print(f"{marker.group(1)} 0", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# harness.py
+
+import configparser
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_POWERSHELL = os.path.join(ROOT, 'benchmarks', 'fake_powershell.py')
+
+def prepare_workdir(site, general=None, server=None):
+    """Create a scratch directory with a config.ini pointing at `site` and make it the working directory."""
+    workdir = tempfile.mkdtemp(prefix='pyitagent-bench-')
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, 'config-example.ini'))
+    config['SERVER']['site'] = site
+    config['SERVER']['api_key'] = 'benchmark'
+    for key, value in (general or {}).items():
+        config['GENERAL'][key] = value
+    for key, value in (server or {}).items():
+        config['SERVER'][key] = value
+    with open(os.path.join(workdir, 'config.ini'), 'w') as file:
+        config.write(file)
+    shutil.copy(os.path.join(ROOT, 'custom_fields-example.json'), os.path.join(workdir, 'custom_fields.json'))
+    os.chdir(workdir)
+    return workdir
+
+def use_fake_powershell():
+    """Run every PowerShell command against benchmarks/fake_powershell.py instead."""
+    from utils import powershell
+    powershell.set_host_factory(lambda: powershell.PowerShellHost(sys.executable, [FAKE_POWERSHELL]))
+    return powershell.get_pool()
+
+def reset_local_state():
+    """Drop the lookup cache and sync fingerprints, as if the agent never ran on this machine."""
+    from api import cache, fingerprint
+    for name in ('pyitagent_cache.json', 'pyitagent_state.json', 'pyitagent_spool.jsonl'):
+        if os.path.exists(name):
+            os.remove(name)
+    cache._cache = None
+    fingerprint._sync_state = None
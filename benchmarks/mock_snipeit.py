@@ -0,0 +1,237 @@
+# mock_snipeit.py
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+class MockSnipeIT:
+    """An in-process stand-in for the parts of the Snipe-IT API the agent talks to.
+
+    Every request is delayed by `latency` seconds to mimic a remote server. With a
+    `rate_limit` it throttles like Snipe-IT does, at most that many requests per `window`
+    seconds are answered and the rest get a 429 with Retry-After (unless `retry_after` is False)
+    and X-RateLimit-* headers.
+    Failures can be injected, a `failure_rate` share of the requests (picked with a seeded
+    random generator) or the next few requests queued with fail_next() are answered with
+    `failure_status`, where status 0 drops the connection without answering.
+    """
+
+    def __init__(self, latency=0.0, port=0, rate_limit=0, window=60.0, failure_rate=0.0, failure_status=503, seed=0, retry_after=True):
+        self.latency = latency
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.random = random.Random(seed)
+        self.queued_failures = []
+        self.failures = 0
+        self.rate_limit = rate_limit
+        self.window = window
+        self.window_start = time.time()
+        self.window_count = 0
+        self.rate_limited = 0
+        self.manufacturers = {}
+        self.models = {}
+        self.hardware = {}
+        self.requests = []
+        self.connections = 0
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        """Forget every created entity, as if the server was freshly installed."""
+        with self.lock:
+            self.manufacturers.clear()
+            self.models.clear()
+            self.hardware.clear()
+        self.reset_counters()
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = []
+            self.connections = 0
+            self.rate_limited = 0
+            self.failures = 0
+            self.window_start = time.time()
+            self.window_count = 0
+
+    def fail_next(self, count=1, status=None):
+        """Answer the next `count` requests with `status` (failure_status by default)."""
+        with self.lock:
+            self.queued_failures.extend([self.failure_status if status is None else status] * count)
+
+    def take_failure(self):
+        """Return the status to fail the current request with, or None to answer it normally."""
+        with self.lock:
+            if self.queued_failures:
+                status = self.queued_failures.pop(0)
+            elif self.failure_rate and self.random.random() < self.failure_rate:
+                status = self.failure_status
+            else:
+                return None
+            self.failures += 1
+            return status
+
+    def take_request(self):
+        """Count a request against the current window, returns the rate limit headers and whether it's allowed."""
+        if not self.rate_limit:
+            return {}, True
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.window_count = now, 0
+            allowed = self.window_count < self.rate_limit
+            if allowed:
+                self.window_count += 1
+            else:
+                self.rate_limited += 1
+            reset = self.window_start + self.window
+            headers = {
+                # Snipe-IT advertises its limit per minute, scale it for shorter test windows
+                'X-RateLimit-Limit': str(round(self.rate_limit * 60 / self.window)),
+                'X-RateLimit-Remaining': str(self.rate_limit - self.window_count),
+            }
+            if not allowed:
+                # Both rounded up to a whole second at which the window has really reset
+                if self.retry_after:
+                    headers['Retry-After'] = str(max(1, math.ceil(reset - now)))
+                headers['X-RateLimit-Reset'] = str(math.ceil(reset))
+            return headers, allowed
+
+    def create(self, table, payload):
+        with self.lock:
+            payload = dict(payload, id=self.next_id)
+            self.next_id += 1
+            table[payload['id']] = payload
+            return payload
+
+    def handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            rate_headers = {}
+
+            def setup(self):
+                with mock.lock:
+                    mock.connections += 1
+                super().setup()
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, body, status=200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in self.rate_headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def read_body(self):
+                length = int(self.headers.get('Content-Length', 0))
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def begin(self, method):
+                url = urlparse(self.path)
+                with mock.lock:
+                    mock.requests.append((method, url.path))
+                if mock.latency:
+                    time.sleep(mock.latency)
+                self.rate_headers, allowed = mock.take_request()
+                if not allowed:
+                    # Drain the body so the keep-alive connection stays usable
+                    self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                    self.reply({'status': 'error', 'messages': 'Too Many Attempts.'}, 429)
+                    return None, None
+                status = mock.take_failure()
+                if status is not None:
+                    self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                    if status == 0:
+                        # Hang up without an answer, like a crashed server or a dropped connection
+                        self.close_connection = True
+                        return None, None
+                    self.reply({'status': 'error', 'messages': 'Injected failure'}, status)
+                    return None, None
+                return url.path.split('/api/v1/', 1)[-1], parse_qs(url.query)
+
+            def invalid_references(self, body):
+                # Snipe-IT answers a 200 with the validation errors per field, eg. for a deleted model
+                tables = {'manufacturer_id': mock.manufacturers, 'model_id': mock.models}
+                return {field: [f"The selected {field.replace('_', ' ')} is invalid."]
+                        for field, table in tables.items() if field in body and body[field] not in table}
+
+            def do_GET(self):
+                path, query = self.begin('GET')
+                if path is None:
+                    return
+                if path == 'manufacturers':
+                    rows = [row for row in mock.manufacturers.values() if row['name'] == query.get('name', [''])[0]]
+                    return self.reply({'total': len(rows), 'rows': rows})
+                if path == 'models':
+                    rows = [row for row in mock.models.values() if row['name'] == query.get('search', [''])[0]]
+                    return self.reply({'total': len(rows[:1]), 'rows': rows[:1]})
+                match = re.fullmatch(r'hardware/byserial/(.+)', path)
+                if match:
+                    rows = [row for row in mock.hardware.values() if row['serial'] == unquote(match.group(1))]
+                    if not rows:
+                        return self.reply({'status': 'error', 'messages': 'Asset does not exist.'})
+                    return self.reply({'total': len(rows), 'rows': rows})
+                self.reply({'status': 'error', 'messages': 'Not found'}, 404)
+
+            def do_POST(self):
+                path, _ = self.begin('POST')
+                if path is None:
+                    return
+                body = self.read_body()
+                tables = {'manufacturers': mock.manufacturers, 'models': mock.models, 'hardware': mock.hardware}
+                if path not in tables:
+                    return self.reply({'status': 'error', 'messages': 'Not found'}, 404)
+                invalid = self.invalid_references(body)
+                if invalid:
+                    return self.reply({'status': 'error', 'messages': invalid})
+                created = mock.create(tables[path], body)
+                self.reply({'status': 'success', 'messages': 'Created', 'payload': created})
+
+            def do_PATCH(self):
+                path, _ = self.begin('PATCH')
+                if path is None:
+                    return
+                # Read before answering, unread body bytes would be taken for the next request on the connection
+                body = self.read_body()
+                match = re.fullmatch(r'hardware/(\d+)', path)
+                if not match:
+                    return self.reply({'status': 'error', 'messages': 'Not found'}, 404)
+                if int(match.group(1)) not in mock.hardware:
+                    # Like Snipe-IT, a deleted asset is an error status with a 200
+                    return self.reply({'status': 'error', 'messages': 'Asset does not exist.'})
+                asset = mock.hardware[int(match.group(1))]
+                invalid = self.invalid_references(body)
+                if invalid:
+                    return self.reply({'status': 'error', 'messages': invalid})
+                asset.update(body)
+                self.reply({'status': 'success', 'messages': 'Updated', 'payload': asset})
+
+        return Handler
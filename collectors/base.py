@@ -0,0 +1,149 @@
+# base.py
+
+import getpass
+import math
+import re
+
+from utils.probe import ProbeResult, run_probes
+from utils.powershell import DEFAULT_TIMEOUT
+
+# Every inventory field a collector can be asked for, see Collector.inventory
+INVENTORY_FIELDS = ['manufacturer', 'model', 'model_number', 'serial_number', 'hostname', 'mac_address', 'disks', 'volumes']
+
+# Three letter EDID manufacturer IDs mapped to the names used in Snipe-IT
+PNP_VENDORS = {
+    'DEL': 'Dell Inc.',
+    'AUO': 'AUO Corporation',
+    'ACI': 'ASUS',
+    'ACR': 'Acer',
+    'HPN': 'HP',
+    'HWP': 'HP',
+    'LEN': 'Lenovo',
+    'SAM': 'Samsung',
+    'SEC': 'Samsung',
+    'LGD': 'LG Electronics',
+    'PHL': 'Philips',
+    'SNY': 'Sony',
+    'MSI': 'MSI',
+    'BNQ': 'BenQ',
+    'AOC': 'AOC',
+    'NEC': 'NEC',
+    'VSC': 'ViewSonic',
+}
+
+# VideoOutputTechnology values of built-in panels: LVDS, embedded DisplayPort, embedded UDI and internal
+INTERNAL_OUTPUTS = (6, 11, 13, 0x80000000)
+
+# A monitor custom field reading one property of a root\wmi class, eg.
+# (Get-WmiObject -Namespace root\wmi -Class WmiMonitorBasicDisplayParams | Select-Object -First 1).MaxHorizontalImageSize
+MONITOR_PROPERTY = re.compile(
+    r"^\(\s*Get-(?:WmiObject|CimInstance)\s+-Namespace\s+['\"]?root[\\/]wmi['\"]?\s+-Class(?:Name)?\s+(\w+)\s*"
+    r"\|\s*Select-Object\s+-First\s+1\s*\)\.(\w+)\s*$",
+    re.IGNORECASE)
+
+def monitor_property(ps_command):
+    """Return (wmi_class, property) if the command reads a per-monitor WMI property, otherwise None."""
+    match = MONITOR_PROPERTY.match(ps_command.strip())
+    return (match.group(1), match.group(2)) if match else None
+
+def property_key(wmi_class, property_name):
+    # How the values of monitor properties are keyed in a monitor's 'Properties'
+    return f"{wmi_class}.{property_name}"
+
+def decode_codes(codes):
+    # WmiMonitorID returns its strings as arrays of character codes padded with zeros
+    if not codes:
+        return "Unknown"
+    return "".join(chr(code) for code in codes if code)
+
+def describe_monitor(manufacturer_code, model, product_code, serial, year, week, instance_name, width, height, active, connection_type):
+    """Build a monitor record from the strings WmiMonitorID decoded, for monitors without a readable EDID.
+
+    width and height are MaxHorizontalImageSize and MaxVerticalImageSize of WmiMonitorBasicDisplayParams,
+    which are in centimeters, the record holds them in millimeters like describe_edid() does.
+    """
+    model = model or "Unknown"
+    if model == "Unknown" and product_code:
+        model = product_code
+    manufacturer = PNP_VENDORS.get(manufacturer_code, manufacturer_code or "Unknown")
+
+    screen_size = "Unknown"
+    if width is not None and height is not None:
+        width, height = width * 10, height * 10
+        screen_size = round(math.sqrt(width ** 2 + height ** 2) / 25.4, 1)
+
+    return {
+        'Manufacturer': manufacturer,
+        'Model': model,
+        'SerialNumber': serial or "",
+        'YearOfManufacture': year,
+        'WeekOfManufacture': week,
+        'InstanceName': instance_name,
+        'ScreenWidth': width or 0,
+        'ScreenHeight': height or 0,
+        'ScreenSizeInches': screen_size,
+        'IsActive': active,
+        # Judged by the connection like describe_edid(), so a monitor doesn't change with its EDID being readable
+        'IsInternalDisplay': connection_type in INTERNAL_OUTPUTS,
+        'ConnectionType': "Unknown" if connection_type is None else connection_type,
+    }
+
+def describe_edid(edid, instance_name, active, connection_type):
+    """Build a monitor record from a parsed EDID, see collectors.edid.parse_edid.
+
+    The sizes come from the preferred timing in millimeters, and a panel counts as internal
+    by the way it's connected rather than by guessing from its name or manufacturer.
+    """
+    # Prefer the serial string, the numeric serial is 0 on many monitors. Panels without a name
+    # descriptor list their vendor and then their part number as text descriptors
+    serial = edid['serial'] or (str(edid['serial_number']) if edid['serial_number'] else "")
+    model = edid['name'] or (edid['text'][-1] if edid['text'] else None) or f"{edid['product_code']:04X}"
+    width, height = edid['width_mm'], edid['height_mm']
+    screen_size = "Unknown"
+    if width and height:
+        screen_size = round(math.sqrt(width ** 2 + height ** 2) / 25.4, 1)
+    return {
+        'Manufacturer': PNP_VENDORS.get(edid['manufacturer'], edid['manufacturer']),
+        'Model': model,
+        'SerialNumber': serial,
+        'YearOfManufacture': edid['year'],
+        'WeekOfManufacture': edid['week'] or 0,
+        'InstanceName': instance_name,
+        'ScreenWidth': width or 0,
+        'ScreenHeight': height or 0,
+        'ScreenSizeInches': screen_size,
+        'IsActive': active,
+        'IsInternalDisplay': connection_type in INTERNAL_OUTPUTS,
+        'ConnectionType': "Unknown" if connection_type is None else connection_type,
+    }
+
+class Collector:
+    """Where the agent reads the machine's hardware from.
+
+    inventory() returns the static fields of INVENTORY_FIELDS which were asked for,
+    monitors() one record per connected monitor in the format of describe_monitor(),
+    with the requested (wmi_class, property) pairs under 'Properties' where the backend can read them,
+    and probe() runs a custom field's PowerShell command. Backends which can't run
+    PowerShell return a failed ProbeResult, so those fields are left untouched in Snipe-IT.
+    """
+
+    name = None
+
+    def inventory(self, fields):
+        raise NotImplementedError
+
+    def chassis_types(self):
+        return []
+
+    def monitors(self, properties=()):
+        return []
+
+    def probe(self, cmd, timeout=DEFAULT_TIMEOUT):
+        return ProbeResult(status=1, stderr=f"The {self.name} collector can't run PowerShell commands")
+
+    def probes(self, commands, max_workers=4, timeout=DEFAULT_TIMEOUT):
+        """Run probes concurrently through self.probe, see utils.probe.run_probes."""
+        return run_probes(commands, max_workers=max_workers, timeout=timeout, probe=self.probe)
+
+    def current_user(self):
+        return getpass.getuser()
@@ -0,0 +1,206 @@
+# edid.py
+#
+# Pure Python EDID 1.3/1.4 and DisplayID 1.x/2.0 parser. The blobs come from the registry
+# (Device Parameters\EDID), WmiMonitorDescriptorMethods or /sys/class/drm/*/edid.
+
+EDID_HEADER = b'\x00\xff\xff\xff\xff\xff\xff\x00'
+BLOCK_SIZE = 128
+
+# EDID extension block tag of a DisplayID section
+DISPLAYID_EXTENSION = 0x70
+
+# Digital interface of EDID 1.4, byte 20 bits 0-3
+INTERFACES = {1: 'DVI', 2: 'HDMI-a', 3: 'HDMI-b', 4: 'MDDI', 5: 'DisplayPort'}
+
+# Display descriptor tags
+DESCRIPTOR_SERIAL = 0xFF
+DESCRIPTOR_TEXT = 0xFE
+DESCRIPTOR_NAME = 0xFC
+
+# DisplayID data block tags, 1.x and 2.0
+DISPLAYID_PRODUCT = (0x00, 0x20)
+DISPLAYID_PARAMETERS = (0x01, 0x21)
+DISPLAYID_TIMING_I = 0x03
+DISPLAYID_TIMING_VII = 0x22
+
+class EdidError(Exception):
+    """The blob is not an EDID (or DisplayID) structure this parser understands."""
+
+def as_bytes(blob):
+    # WMI hands out lists of ints, the registry and /sys bytes
+    if isinstance(blob, (bytes, bytearray, memoryview)):
+        return bytes(blob)
+    if isinstance(blob, str):
+        return bytes.fromhex(blob)
+    return bytes(blob)
+
+def decode_pnp(code):
+    """Decode the compressed three letter PNP manufacturer ID, eg. 0x10AC -> 'DEL'."""
+    return "".join(chr(((code >> shift) & 0x1F) + 64) for shift in (10, 5, 0))
+
+def text(data):
+    # Descriptor strings end at a line feed and are padded with spaces
+    return data.split(b'\x0a')[0].decode('ascii', 'replace').strip()
+
+def timing(pixel_clock, h_active, h_blank, v_active, v_blank, interlaced=False, width_mm=None, height_mm=None, preferred=False):
+    h_total = h_active + h_blank
+    v_total = v_active + v_blank
+    refresh = pixel_clock / (h_total * v_total) if pixel_clock and h_total and v_total else 0.0
+    refresh *= 2 if interlaced else 1
+    return {
+        'pixel_clock_khz': pixel_clock // 1000,
+        'width': h_active,
+        'height': v_active,
+        'refresh_hz': round(refresh, 3),
+        # How long a line (blanking included) and a refresh take, in microseconds
+        'line_us': round(h_total * 1000000 / pixel_clock, 3) if pixel_clock and h_total else None,
+        'frame_us': round(1000000 / refresh, 1) if refresh else None,
+        'interlaced': interlaced,
+        'width_mm': width_mm,
+        'height_mm': height_mm,
+        'preferred': preferred,
+    }
+
+def detailed_timing(descriptor, preferred=False):
+    """Decode an 18 byte EDID detailed timing descriptor."""
+    pixel_clock = int.from_bytes(descriptor[0:2], 'little') * 10000
+    return timing(
+        pixel_clock,
+        descriptor[2] | (descriptor[4] & 0xF0) << 4,
+        descriptor[3] | (descriptor[4] & 0x0F) << 8,
+        descriptor[5] | (descriptor[7] & 0xF0) << 4,
+        descriptor[6] | (descriptor[7] & 0x0F) << 8,
+        bool(descriptor[17] & 0x80),
+        descriptor[12] | (descriptor[14] & 0xF0) << 4 or None,
+        descriptor[13] | (descriptor[14] & 0x0F) << 8 or None,
+        preferred,
+    )
+
+def displayid_timing(descriptor, clock_unit):
+    """Decode a 20 byte DisplayID type I (10 kHz clock) or type VII (1 kHz clock) timing."""
+    return timing(
+        (int.from_bytes(descriptor[0:3], 'little') + 1) * clock_unit,
+        int.from_bytes(descriptor[4:6], 'little') + 1,
+        int.from_bytes(descriptor[6:8], 'little') + 1,
+        int.from_bytes(descriptor[12:14], 'little') + 1,
+        int.from_bytes(descriptor[14:16], 'little') + 1,
+        bool(descriptor[3] & 0x10),
+        preferred=bool(descriptor[3] & 0x80),
+    )
+
+def parse_displayid(blob):
+    """Parse a DisplayID section, standalone or the payload of an EDID extension block."""
+    data = as_bytes(blob)
+    if len(data) < 5:
+        raise EdidError("DisplayID section is too short")
+    version = data[0]
+    end = min(len(data), 4 + data[1])
+    displayid = {'version': f"{version >> 4}.{version & 0x0F}", 'manufacturer': None, 'product_code': None, 'serial': None,
+                 'week': None, 'year': None, 'name': None, 'width_mm': None, 'height_mm': None, 'timings': []}
+    offset = 4
+    while offset + 3 <= end:
+        tag, revision, length = data[offset], data[offset + 1], data[offset + 2]
+        payload = data[offset + 3:offset + 3 + length]
+        offset += 3 + length
+        if tag == 0 and length == 0:
+            # Padding up to the checksum
+            break
+        if tag in DISPLAYID_PRODUCT and len(payload) >= 12:
+            if tag == 0x00:
+                displayid['manufacturer'] = payload[0:3].decode('ascii', 'replace')
+            else:
+                # DisplayID 2.0 identifies the manufacturer by its IEEE OUI
+                displayid['manufacturer'] = payload[0:3].hex().upper()
+            displayid['product_code'] = int.from_bytes(payload[3:5], 'little')
+            displayid['serial'] = int.from_bytes(payload[5:9], 'little') or None
+            displayid['week'] = payload[9] if 1 <= payload[9] <= 54 else None
+            displayid['year'] = payload[10] + 2000 if payload[10] else None
+            displayid['name'] = text(payload[12:12 + payload[11]]) or None
+        elif tag in DISPLAYID_PARAMETERS and len(payload) >= 4:
+            # Tenths of a millimeter, DisplayID 2.0 can switch to whole millimeters
+            scale = 1.0 if tag == 0x21 and revision & 0x80 else 0.1
+            displayid['width_mm'] = round(int.from_bytes(payload[0:2], 'little') * scale) or None
+            displayid['height_mm'] = round(int.from_bytes(payload[2:4], 'little') * scale) or None
+        elif tag in (DISPLAYID_TIMING_I, DISPLAYID_TIMING_VII):
+            clock_unit = 10000 if tag == DISPLAYID_TIMING_I else 1000
+            for start in range(0, len(payload) - 19, 20):
+                displayid['timings'].append(displayid_timing(payload[start:start + 20], clock_unit))
+    preferred = [entry for entry in displayid['timings'] if entry['preferred']]
+    displayid['preferred_timing'] = (preferred or displayid['timings'] or [None])[0]
+    return displayid
+
+def parse_edid(blob):
+    """Parse an EDID 1.3/1.4 blob with its extension blocks into a dict.
+
+    Raises EdidError if the base block is missing or malformed, a bad checksum is
+    reported in 'checksum_ok' since Windows and Linux hand the blob over as is.
+    """
+    data = as_bytes(blob)
+    if len(data) < BLOCK_SIZE or data[:8] != EDID_HEADER:
+        raise EdidError("Not an EDID base block")
+    if data[18] != 1:
+        raise EdidError(f"Unsupported EDID version {data[18]}.{data[19]}")
+
+    digital = bool(data[20] & 0x80)
+    week = data[16]
+    edid = {
+        'version': f"{data[18]}.{data[19]}",
+        'manufacturer': decode_pnp(int.from_bytes(data[8:10], 'big')),
+        'product_code': int.from_bytes(data[10:12], 'little'),
+        'serial_number': int.from_bytes(data[12:16], 'little') or None,
+        'serial': None,
+        'name': None,
+        'text': [],
+        # Week 0xFF marks the year as the model year in EDID 1.4
+        'week': week if 1 <= week <= 54 else None,
+        'year': data[17] + 1990,
+        'model_year': week == 0xFF,
+        'digital': digital,
+        'interface': INTERFACES.get(data[20] & 0x0F) if digital and data[19] >= 4 else None,
+        'width_cm': data[21] or None,
+        'height_cm': data[22] or None,
+        'width_mm': None,
+        'height_mm': None,
+        'preferred_timing': None,
+        'extensions': data[126],
+        'checksum_ok': sum(data[:BLOCK_SIZE]) % 256 == 0,
+        'displayid': None,
+    }
+
+    for offset in range(54, 126, 18):
+        descriptor = data[offset:offset + 18]
+        if descriptor[0] or descriptor[1]:
+            # The first detailed timing is the preferred one
+            if edid['preferred_timing'] is None:
+                edid['preferred_timing'] = detailed_timing(descriptor, preferred=True)
+            continue
+        if descriptor[3] == DESCRIPTOR_NAME:
+            edid['name'] = text(descriptor[5:]) or None
+        elif descriptor[3] == DESCRIPTOR_SERIAL:
+            edid['serial'] = text(descriptor[5:]) or None
+        elif descriptor[3] == DESCRIPTOR_TEXT:
+            edid['text'].append(text(descriptor[5:]))
+
+    for index in range(1, min(edid['extensions'], len(data) // BLOCK_SIZE - 1) + 1):
+        block = data[index * BLOCK_SIZE:(index + 1) * BLOCK_SIZE]
+        if block[0] == DISPLAYID_EXTENSION and edid['displayid'] is None:
+            try:
+                edid['displayid'] = parse_displayid(block[1:])
+            except EdidError:
+                pass
+
+    base_timing = edid['preferred_timing'] or {}
+    edid['width_mm'] = base_timing.get('width_mm')
+    edid['height_mm'] = base_timing.get('height_mm')
+    # Monitors beyond what a detailed timing can describe, eg. 8K, put their native timing in DisplayID
+    displayid = edid['displayid']
+    if displayid:
+        if displayid['preferred_timing'] and (displayid['preferred_timing']['preferred'] or not base_timing):
+            edid['preferred_timing'] = displayid['preferred_timing']
+        edid['width_mm'] = edid['width_mm'] or displayid['width_mm']
+        edid['height_mm'] = edid['height_mm'] or displayid['height_mm']
+        edid['name'] = edid['name'] or displayid['name']
+    if edid['width_mm'] is None and edid['width_cm'] and edid['height_cm']:
+        edid['width_mm'] = edid['width_cm'] * 10
+        edid['height_mm'] = edid['height_cm'] * 10
+    return edid
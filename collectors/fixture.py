@@ -0,0 +1,96 @@
+# fixture.py
+
+import json
+import threading
+from datetime import datetime
+
+from collectors.base import Collector
+from utils.common import resolve_path
+from utils.probe import ProbeResult, convert
+from utils.powershell import DEFAULT_TIMEOUT
+
+def encode(value):
+    # Dates are stored as ISO strings, convert() turns them back into datetimes on replay
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Can't store {type(value).__name__} in a fixture")
+
+class FixtureCollector(Collector):
+    """Replays a machine recorded with RecordingCollector, eg. to run the whole pipeline on CI.
+
+    A fixture is a JSON document with the 'inventory', 'chassis_types', 'monitors',
+    'probes' (command -> value) and 'user' of the recorded machine.
+    """
+
+    name = 'fixture'
+
+    def __init__(self, path):
+        self.path = resolve_path(path)
+        try:
+            with open(self.path, 'r') as file:
+                self.data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            raise Exception(f"Could not load the collector fixture {self.path}: {e}")
+
+    def inventory(self, fields):
+        inventory = self.data.get('inventory', {})
+        return {field: inventory[field] for field in fields if field in inventory}
+
+    def chassis_types(self):
+        return list(self.data.get('chassis_types', []))
+
+    def monitors(self, properties=()):
+        # The recorded monitors carry the 'Properties' which were asked for while recording
+        return [dict(monitor) for monitor in self.data.get('monitors', [])]
+
+    def probe(self, cmd, timeout=DEFAULT_TIMEOUT):
+        probes = self.data.get('probes', {})
+        if cmd not in probes:
+            return ProbeResult(status=1, stderr="Not recorded in the fixture")
+        return ProbeResult(convert(probes[cmd]))
+
+    def current_user(self):
+        return self.data.get('user', "")
+
+class RecordingCollector(Collector):
+    """Passes every call through to another collector and records the answers as a fixture."""
+
+    name = 'recording'
+
+    def __init__(self, collector, path):
+        self.collector = collector
+        self.path = resolve_path(path)
+        self.data = {'backend': collector.name, 'inventory': {}, 'chassis_types': [], 'monitors': [], 'probes': {}}
+        self._lock = threading.Lock()
+
+    def inventory(self, fields):
+        inventory = self.collector.inventory(fields)
+        with self._lock:
+            self.data['inventory'].update(inventory)
+        return inventory
+
+    def chassis_types(self):
+        self.data['chassis_types'] = self.collector.chassis_types()
+        return self.data['chassis_types']
+
+    def monitors(self, properties=()):
+        monitors = self.collector.monitors(properties)
+        self.data['monitors'] = [dict(monitor) for monitor in monitors]
+        return monitors
+
+    def probe(self, cmd, timeout=DEFAULT_TIMEOUT):
+        result = self.collector.probe(cmd, timeout)
+        if result.ok:
+            with self._lock:
+                self.data['probes'][cmd] = result.value
+        return result
+
+    def current_user(self):
+        self.data['user'] = self.collector.current_user()
+        return self.data['user']
+
+    def save(self):
+        with self._lock:
+            with open(self.path, 'w') as file:
+                json.dump(self.data, file, indent=4, default=encode)
+        print(f"Recorded the collected data to {self.path}")
@@ -0,0 +1,129 @@
+# linux.py
+
+import glob
+import os
+import socket
+
+from collectors.base import Collector, describe_edid
+from collectors.edid import parse_edid, EdidError
+
+DMI_PATH = '/sys/class/dmi/id'
+SYS_BLOCK = '/sys/block'
+SYS_NET = '/sys/class/net'
+SYS_DRM = '/sys/class/drm'
+
+# Block devices which aren't disks
+VIRTUAL_BLOCK_PREFIXES = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'fd', 'nbd')
+
+# DRM connector types mapped to the VideoOutputTechnology values WMI reports
+CONNECTION_TYPES = {'VGA': 0, 'DVI': 4, 'HDMI': 5, 'LVDS': 6, 'DP': 10, 'eDP': 11, 'DSI': 0x80000000}
+
+def read(path, default=""):
+    try:
+        with open(path, 'r') as file:
+            return file.read().strip()
+    except OSError:
+        return default
+
+def read_bytes(path):
+    try:
+        with open(path, 'rb') as file:
+            return file.read()
+    except OSError:
+        return b""
+
+class LinuxCollector(Collector):
+    """Reads the hardware straight from /sys and /proc, without spawning anything.
+
+    DMI provides the identity of the machine, /sys/block the disks, /proc/mounts the
+    volumes and /sys/class/drm the EDID of every connected monitor.
+    """
+
+    name = 'linux'
+
+    def __init__(self, root=''):
+        # Everything is read relative to root, so a copy of /sys can be used instead
+        self.root = root
+
+    def path(self, *parts):
+        return self.root + os.path.join(*parts)
+
+    def dmi(self, key):
+        return read(self.path(DMI_PATH, key))
+
+    def mac_address(self):
+        for interface in sorted(os.listdir(self.path(SYS_NET)) if os.path.isdir(self.path(SYS_NET)) else []):
+            if interface == 'lo' or read(self.path(SYS_NET, interface, 'operstate')) != 'up':
+                continue
+            address = read(self.path(SYS_NET, interface, 'address'))
+            if address and address != '00:00:00:00:00:00':
+                return address.upper()
+        return ""
+
+    def disks(self):
+        disks = []
+        for device in sorted(os.listdir(self.path(SYS_BLOCK)) if os.path.isdir(self.path(SYS_BLOCK)) else []):
+            if device.startswith(VIRTUAL_BLOCK_PREFIXES):
+                continue
+            base = self.path(SYS_BLOCK, device)
+            removable = read(os.path.join(base, 'removable'), '0') == '1'
+            disks.append({
+                'media_type': 'Removable Media' if removable else 'Fixed hard disk media',
+                'model': read(os.path.join(base, 'device', 'model')),
+                'serial': read(os.path.join(base, 'device', 'serial')) or read(os.path.join(base, 'device', 'wwid')),
+                # The size is always counted in 512 byte sectors
+                'size': int(read(os.path.join(base, 'size'), '0') or 0) * 512,
+            })
+        return disks
+
+    def volumes(self):
+        volumes = []
+        seen = set()
+        for line in read(self.path('/proc/mounts')).splitlines():
+            parts = line.split()
+            if len(parts) < 2 or not parts[0].startswith('/dev/') or parts[0].startswith('/dev/loop') or parts[0] in seen:
+                continue
+            seen.add(parts[0])
+            mount_point = parts[1].replace('\\040', ' ')
+            try:
+                stats = os.statvfs(self.path(mount_point))
+            except OSError:
+                continue
+            volumes.append({'device_id': mount_point, 'size': stats.f_blocks * stats.f_frsize, 'free': stats.f_bavail * stats.f_frsize})
+        return volumes
+
+    def inventory(self, fields):
+        snapshot = {}
+        for field in fields:
+            match field:
+                case 'manufacturer': snapshot[field] = self.dmi('sys_vendor')
+                case 'model': snapshot[field] = self.dmi('product_name')
+                case 'model_number': snapshot[field] = self.dmi('board_name')
+                # Only readable by root, like Win32_BIOS needs an elevated session on some machines
+                case 'serial_number': snapshot[field] = self.dmi('product_serial')
+                case 'hostname': snapshot[field] = socket.gethostname().split('.')[0].upper()
+                case 'mac_address': snapshot[field] = self.mac_address()
+                case 'disks': snapshot[field] = self.disks()
+                case 'volumes': snapshot[field] = self.volumes()
+        return snapshot
+
+    def chassis_types(self):
+        chassis_type = self.dmi('chassis_type')
+        return [int(chassis_type)] if chassis_type.isdigit() else []
+
+    def monitors(self, properties=()):
+        # There is no WMI to read the monitor custom fields' properties from
+        monitors = []
+        for connector in sorted(glob.glob(self.path(SYS_DRM, 'card*-*'))):
+            if read(os.path.join(connector, 'status')) != 'connected':
+                continue
+            try:
+                edid = parse_edid(read_bytes(os.path.join(connector, 'edid')))
+            except EdidError:
+                continue
+            # eg. card0-DP-1 or card1-HDMI-A-2
+            name = os.path.basename(connector).split('-', 1)[1]
+            connector_type = name.rsplit('-', 1)[0].split('-')[0]
+            monitor = describe_edid(edid, name, read(os.path.join(connector, 'enabled')) == 'enabled', CONNECTION_TYPES.get(connector_type))
+            monitors.append(monitor)
+        return monitors
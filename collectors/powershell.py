@@ -0,0 +1,152 @@
+# powershell.py
+
+import base64
+import binascii
+
+from collectors.base import Collector, describe_edid, describe_monitor, decode_codes
+from collectors.edid import parse_edid, EdidError
+from utils.probe import run_probe, as_list
+from utils.powershell import DEFAULT_TIMEOUT
+
+# Field name -> (WMI class it is read from, PowerShell expression producing the value)
+FIELD_QUERIES = {
+    'manufacturer': ('Win32_ComputerSystem', "[string]$Win32_ComputerSystem.Manufacturer"),
+    'model': ('Win32_ComputerSystem', "[string]$Win32_ComputerSystem.Model"),
+    'model_number': ('Win32_BaseBoard', "[string]$Win32_BaseBoard.Product"),
+    'serial_number': ('Win32_BIOS', "[string]$Win32_BIOS.SerialNumber"),
+    'hostname': ('Win32_OperatingSystem', "[string]$Win32_OperatingSystem.CSName"),
+    'mac_address': ('Win32_NetworkAdapterConfiguration', "[string]($Win32_NetworkAdapterConfiguration | Where-Object { $_.IPEnabled -eq $true } | Select-Object -First 1).MACAddress"),
+    'disks': ('Win32_DiskDrive', "@($Win32_DiskDrive | ForEach-Object { [ordered]@{ media_type = [string]$_.MediaType; model = [string]$_.Model; serial = [string]$_.SerialNumber; size = [uint64]$_.Size } })"),
+    'volumes': ('Win32_LogicalDisk', "@($Win32_LogicalDisk | Where-Object { $_.DriveType -eq 3 } | ForEach-Object { [ordered]@{ device_id = [string]$_.DeviceID; size = [uint64]$_.Size; free = [uint64]$_.FreeSpace } })"),
+}
+
+# Lists the connected monitors with their raw EDID, which is parsed by collectors.edid.
+# $MonitorProperties is prepended by build_monitor_script.
+MONITOR_SCRIPT = r"""
+$monitorIds = @(Get-WmiObject -Namespace root\wmi -Class WmiMonitorID)
+$connections = @(Get-WmiObject -Namespace root\wmi -Class WmiMonitorConnectionParams)
+$displayParams = @(Get-WmiObject -Namespace root\wmi -Class WmiMonitorBasicDisplayParams)
+
+# Every class the monitor custom fields read from is enumerated once
+$propertyRows = @{ WmiMonitorID = $monitorIds; WmiMonitorConnectionParams = $connections; WmiMonitorBasicDisplayParams = $displayParams }
+foreach ($property in $MonitorProperties) {
+    if (-not $propertyRows.ContainsKey($property.Class)) {
+        $propertyRows[$property.Class] = @(Get-WmiObject -Namespace root\wmi -Class $property.Class)
+    }
+}
+
+foreach ($monitor in $monitorIds) {
+    $instanceName = $monitor.InstanceName
+    $connection = $connections | Where-Object { $_.InstanceName -eq $instanceName } | Select-Object -First 1
+    $params = $displayParams | Where-Object { $_.InstanceName -eq $instanceName } | Select-Object -First 1
+
+    # The EDID is stored under the device in the registry, its instance is the WMI one without the _0 suffix
+    $edid = (Get-ItemProperty -Path "HKLM:\SYSTEM\CurrentControlSet\Enum\$($instanceName -replace '_\d+$', '')\Device Parameters" -Name EDID -ErrorAction SilentlyContinue).EDID
+    if (-not $edid) {
+        # Otherwise read it block by block from the monitor itself
+        $descriptor = Get-WmiObject -Namespace root\wmi -Class WmiMonitorDescriptorMethods -ErrorAction SilentlyContinue | Where-Object { $_.InstanceName -eq $instanceName } | Select-Object -First 1
+        if ($descriptor) {
+            $blocks = @(,([byte[]]$descriptor.WmiGetMonitorRawEEdidV1Block(0).BlockContent))
+            for ($block = 1; $block -le $blocks[0][126]; $block++) {
+                $blocks += ,([byte[]]$descriptor.WmiGetMonitorRawEEdidV1Block($block).BlockContent)
+            }
+            $edid = [byte[]]($blocks | ForEach-Object { $_ })
+        }
+    }
+
+    # Values of the per-monitor custom fields, keyed by Class.Property
+    $properties = [ordered]@{}
+    foreach ($property in $MonitorProperties) {
+        $row = $propertyRows[$property.Class] | Where-Object { $_.InstanceName -eq $instanceName } | Select-Object -First 1
+        $properties["$($property.Class).$($property.Property)"] = if ($row) { $row.($property.Property) } else { $null }
+    }
+
+    [PSCustomObject]@{
+        InstanceName = $instanceName
+        IsActive = $monitor.Active
+        ConnectionType = if ($connection) { $connection.VideoOutputTechnology } else { $null }
+        Edid = if ($edid) { [Convert]::ToBase64String([byte[]]$edid) } else { $null }
+        # What WmiMonitorID decoded itself, for monitors without a readable EDID
+        ManufacturerName = $monitor.ManufacturerName
+        UserFriendlyName = $monitor.UserFriendlyName
+        ProductCodeID = $monitor.ProductCodeID
+        SerialNumberID = $monitor.SerialNumberID
+        YearOfManufacture = $monitor.YearOfManufacture
+        WeekOfManufacture = $monitor.WeekOfManufacture
+        # In centimeters, see collectors.base.describe_monitor
+        MaxHorizontalImageSize = if ($params) { $params.MaxHorizontalImageSize } else { $null }
+        MaxVerticalImageSize = if ($params) { $params.MaxVerticalImageSize } else { $null }
+        Properties = $properties
+    }
+}
+"""
+
+class PowerShellCollector(Collector):
+    """Collects everything through the shared pool of long-lived PowerShell sessions.
+
+    The inventory is a single script querying every WMI class once, so it costs one round trip.
+    """
+
+    name = 'powershell'
+
+    def build_script(self, fields):
+        classes = []
+        for field in fields:
+            wmi_class = FIELD_QUERIES[field][0]
+            if wmi_class not in classes:
+                classes.append(wmi_class)
+
+        lines = ["$ErrorActionPreference = 'SilentlyContinue'"]
+        for wmi_class in classes:
+            lines.append(f"${wmi_class} = @(Get-CimInstance -ClassName {wmi_class})")
+        lines.append("$result = [ordered]@{}")
+        for field in fields:
+            lines.append(f"$result['{field}'] = {FIELD_QUERIES[field][1]}")
+        lines.append("$result")
+        return "\n".join(lines)
+
+    def inventory(self, fields):
+        result = run_probe(self.build_script([field for field in fields if field in FIELD_QUERIES]), name='inventory')
+        if not result.ok or not isinstance(result.value, dict):
+            print(f"Error collecting inventory data: {result.stderr or result.value}")
+            return {}
+        return result.value
+
+    def chassis_types(self):
+        return as_list(run_probe("(Get-WmiObject -Class Win32_SystemEnclosure).ChassisTypes").value)
+
+    def build_monitor_script(self, properties=()):
+        # The classes and properties are \w+ only, see collectors.base.MONITOR_PROPERTY
+        entries = ", ".join(f"@{{ Class = '{wmi_class}'; Property = '{property_name}' }}" for wmi_class, property_name in properties)
+        return f"$MonitorProperties = @({entries})\n" + MONITOR_SCRIPT
+
+    def monitors(self, properties=()):
+        result = run_probe(self.build_monitor_script(properties), name='monitors')
+        if not result.ok:
+            print(f"Error collecting monitor data: {result.stderr or 'timed out'}")
+            return []
+        # A single monitor comes back as an object, several as a list
+        return [self.describe(entry) for entry in as_list(result.value) if isinstance(entry, dict)]
+
+    def describe(self, entry):
+        """Turn an entry of MONITOR_SCRIPT into a monitor record, from its EDID where there is one."""
+        monitor = None
+        if entry.get('Edid'):
+            try:
+                monitor = describe_edid(parse_edid(base64.b64decode(entry['Edid'])), entry.get('InstanceName'), entry.get('IsActive'), entry.get('ConnectionType'))
+            except (EdidError, binascii.Error) as e:
+                print(f"Could not parse the EDID of {entry.get('InstanceName')}: {e}")
+        if monitor is None:
+            monitor = describe_monitor(decode_codes(entry.get('ManufacturerName')), decode_codes(entry.get('UserFriendlyName')),
+                                       decode_codes(entry.get('ProductCodeID')) if entry.get('ProductCodeID') else None,
+                                       decode_codes(entry.get('SerialNumberID')), entry.get('YearOfManufacture'), entry.get('WeekOfManufacture'),
+                                       entry.get('InstanceName'), entry.get('MaxHorizontalImageSize'), entry.get('MaxVerticalImageSize'),
+                                       entry.get('IsActive'), entry.get('ConnectionType'))
+        monitor['Properties'] = entry.get('Properties') or {}
+        return monitor
+
+    def probe(self, cmd, timeout=DEFAULT_TIMEOUT):
+        return run_probe(cmd, timeout)
+
+    def current_user(self):
+        return run_probe("[System.Security.Principal.WindowsIdentity]::GetCurrent().Name").value or ""
@@ -0,0 +1,59 @@
+# registry.py
+
+import importlib
+import os
+import threading
+
+from config.settings import get_settings
+
+# Backend name -> "module:class", imported only when selected so optional dependencies stay optional
+BACKENDS = {
+    'powershell': 'collectors.powershell:PowerShellCollector',
+    'wmi': 'collectors.wmi:WmiCollector',
+    'linux': 'collectors.linux:LinuxCollector',
+    'fixture': 'collectors.fixture:FixtureCollector',
+}
+
+_collector = None
+_collector_key = None
+_collector_lock = threading.Lock()
+
+def register_backend(name, target):
+    """Add a backend, target is either a "module:class" string or a callable taking no arguments."""
+    BACKENDS[name] = target
+
+def backend_name():
+    name = get_settings().config['GENERAL'].get('collector', 'powershell') or 'powershell'
+    if name == 'auto':
+        return 'powershell' if os.name == 'nt' else 'linux'
+    return name
+
+def create_collector(name):
+    if name not in BACKENDS:
+        raise Exception(f"Unknown collector '{name}', choose one of: {', '.join(BACKENDS)}")
+    target = BACKENDS[name]
+    if callable(target):
+        return target()
+    module, cls = target.split(':')
+    factory = getattr(importlib.import_module(module), cls)
+    if name == 'fixture':
+        return factory(get_settings().config['GENERAL'].get('collector_fixture', 'fixture.json'))
+    return factory()
+
+def get_collector():
+    """Return the process wide collector, the backend is chosen by [GENERAL] collector in config.ini."""
+    global _collector, _collector_key
+    general = get_settings().config['GENERAL']
+    key = (backend_name(), general.get('collector_fixture'))
+    with _collector_lock:
+        if _collector is None or (_collector_key is not None and _collector_key != key):
+            _collector = create_collector(key[0])
+            _collector_key = key
+        return _collector
+
+def set_collector(collector):
+    """Use this collector for the rest of the process, eg. a RecordingCollector or one built in a benchmark."""
+    global _collector, _collector_key
+    with _collector_lock:
+        _collector = collector
+        _collector_key = None
@@ -0,0 +1,149 @@
+# wmi.py
+
+import re
+import threading
+
+from collectors.base import describe_edid, describe_monitor, decode_codes, property_key
+from collectors.edid import parse_edid, EdidError
+from collectors.powershell import PowerShellCollector
+
+try:
+    import pythoncom
+    import wmi
+except ImportError:
+    # Optional, only needed when the wmi collector is selected
+    pythoncom = None
+    wmi = None
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class WmiCollector(PowerShellCollector):
+    """Queries WMI directly over COM, without going through PowerShell.
+
+    Needs the optional wmi package (and pywin32). Monitors are described from the EDID in the
+    registry. Custom field probes are PowerShell commands, so those still run through the
+    PowerShell sessions.
+    """
+
+    name = 'wmi'
+
+    def __init__(self):
+        if wmi is None:
+            raise Exception("The wmi collector needs the wmi package, install it with: pip install wmi")
+        self._local = threading.local()
+
+    def connection(self, namespace='root\\cimv2'):
+        # COM objects can't be shared between threads, every thread gets its own connections
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            pythoncom.CoInitialize()
+            connections = self._local.connections = {}
+        if namespace not in connections:
+            connections[namespace] = wmi.WMI(namespace=namespace)
+        return connections[namespace]
+
+    def query(self, wmi_class, namespace='root\\cimv2'):
+        try:
+            return list(getattr(self.connection(namespace), wmi_class)())
+        except Exception as e:
+            print(f"Error querying {wmi_class}: {e}")
+            return []
+
+    def inventory(self, fields):
+        snapshot = {}
+        classes = {}
+
+        def first(wmi_class):
+            if wmi_class not in classes:
+                classes[wmi_class] = self.query(wmi_class)
+            return classes[wmi_class][0] if classes[wmi_class] else None
+
+        for field in fields:
+            match field:
+                case 'manufacturer' | 'model':
+                    system = first('Win32_ComputerSystem')
+                    snapshot[field] = str(getattr(system, field.capitalize(), None) or "")
+                case 'model_number':
+                    snapshot[field] = str(getattr(first('Win32_BaseBoard'), 'Product', None) or "")
+                case 'serial_number':
+                    snapshot[field] = str(getattr(first('Win32_BIOS'), 'SerialNumber', None) or "")
+                case 'hostname':
+                    snapshot[field] = str(getattr(first('Win32_OperatingSystem'), 'CSName', None) or "")
+                case 'mac_address':
+                    adapters = [adapter for adapter in self.query('Win32_NetworkAdapterConfiguration') if adapter.IPEnabled]
+                    snapshot[field] = str(adapters[0].MACAddress or "") if adapters else ""
+                case 'disks':
+                    snapshot[field] = [{'media_type': str(disk.MediaType or ""), 'model': str(disk.Model or ""),
+                                        'serial': str(disk.SerialNumber or ""), 'size': to_int(disk.Size) or 0}
+                                       for disk in self.query('Win32_DiskDrive')]
+                case 'volumes':
+                    snapshot[field] = [{'device_id': str(volume.DeviceID or ""), 'size': to_int(volume.Size) or 0,
+                                        'free': to_int(volume.FreeSpace) or 0}
+                                       for volume in self.query('Win32_LogicalDisk') if to_int(volume.DriveType) == 3]
+        return snapshot
+
+    def chassis_types(self):
+        return [chassis_type for enclosure in self.query('Win32_SystemEnclosure') for chassis_type in (enclosure.ChassisTypes or [])]
+
+    def registry_edid(self, instance_name):
+        # The EDID is stored under the device, its instance is the WMI one without the _0 suffix
+        if winreg is None or not instance_name:
+            return None
+        device = re.sub(r'_\d+$', '', instance_name)
+        path = f"SYSTEM\\CurrentControlSet\\Enum\\{device}\\Device Parameters"
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
+                return winreg.QueryValueEx(key, 'EDID')[0]
+        except OSError:
+            return None
+
+    def monitors(self, properties=()):
+        display_params = {params.InstanceName: params for params in self.query('WmiMonitorBasicDisplayParams', 'root\\wmi')}
+        connections = {connection.InstanceName: connection for connection in self.query('WmiMonitorConnectionParams', 'root\\wmi')}
+        # Every class the monitor custom fields read from is queried once
+        monitor_ids = self.query('WmiMonitorID', 'root\\wmi')
+        rows = {'WmiMonitorID': {monitor.InstanceName: monitor for monitor in monitor_ids},
+                'WmiMonitorBasicDisplayParams': display_params, 'WmiMonitorConnectionParams': connections}
+        for wmi_class, _ in properties:
+            if wmi_class not in rows:
+                rows[wmi_class] = {row.InstanceName: row for row in self.query(wmi_class, 'root\\wmi')}
+        monitors = []
+        for monitor in monitor_ids:
+            params = display_params.get(monitor.InstanceName)
+            connection = connections.get(monitor.InstanceName)
+            connection_type = connection.VideoOutputTechnology if connection else None
+            edid = self.registry_edid(monitor.InstanceName)
+            if edid:
+                try:
+                    monitors.append(describe_edid(parse_edid(edid), monitor.InstanceName, monitor.Active, connection_type))
+                except EdidError as e:
+                    print(f"Could not parse the EDID of {monitor.InstanceName}: {e}")
+                    edid = None
+            if not edid:
+                monitors.append(describe_monitor(
+                    decode_codes(monitor.ManufacturerName),
+                    decode_codes(monitor.UserFriendlyName),
+                    decode_codes(monitor.ProductCodeID) if monitor.ProductCodeID else None,
+                    decode_codes(monitor.SerialNumberID),
+                    monitor.YearOfManufacture,
+                    monitor.WeekOfManufacture,
+                    monitor.InstanceName,
+                    params.MaxHorizontalImageSize if params else None,
+                    params.MaxVerticalImageSize if params else None,
+                    monitor.Active,
+                    connection_type,
+                ))
+            monitors[-1]['Properties'] = {
+                property_key(wmi_class, property_name): getattr(rows[wmi_class].get(monitor.InstanceName), property_name, None)
+                for wmi_class, property_name in properties
+            }
+        return monitors
@@ -3,17 +3,40 @@
 import configparser
 import os
 import json
+import threading
+from types import MappingProxyType
 
 from utils.common import resolve_path
 
+# Keys which must be present in config.ini, per section
+REQUIRED_CONFIG_KEYS = {
+    'SERVER': ['site', 'api_key'],
+    'GENERAL': ['pyitagent_asset_collection'],
+    'DEFAULTS': ['snipeit_status_id', 'snipeit_company_id', 'snipeit_category_id', 'snipeit_fieldset_id'],
+    'DEBUGGING': ['silent_mode', 'slack_logging'],
+}
+
 class GlobalSettings:
     def __init__(self):
-        self.config = self.get_config()
-        self.custom_fields = self.get_custom_fields()
-    
+        self.mtimes = self.get_mtimes()
+        config = self.get_config()
+        custom_fields = self.get_custom_fields()
+        self.validate(config, custom_fields)
+        self.config = freeze(config)
+        self.custom_fields = freeze(custom_fields)
+
+    def get_mtimes(self):
+        mtimes = []
+        for path in (resolve_path('config.ini'), resolve_path('custom_fields.json')):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
     def get_config(self):
         config_path = resolve_path('config.ini')
-        
+
         if not os.path.exists(config_path):
             # Example code to generate a default config.ini, uncomment and modify as needed
             # config = configparser.ConfigParser()
@@ -26,22 +49,31 @@ class GlobalSettings:
 
         config = configparser.ConfigParser()
         config.read(config_path)
-        
+
         # Assuming you know which keys should be treated as boolean
-        boolean_keys = ['silent_mode', 'slack_logging', 'pyitagent_asset_collection', 'pyitagent_asset_tag_generation', 'pyitagent_asset_monitor_collection']  # Add your boolean keys here
-        
+        boolean_keys = ['silent_mode', 'slack_logging', 'pyitagent_asset_collection', 'pyitagent_asset_tag_generation', 'pyitagent_asset_monitor_collection', 'force_full_sync', 'async_pipeline', 'scheduled', 'daemon', 'run_report', 'slack_run_report']  # Add your boolean keys here
+        integer_keys = ['probe_workers', 'max_hosts', 'probe_timeout', 'lookup_cache_ttl', 'spool_workers', 'rate_limit', 'max_retries', 'schedule_window', 'daemon_interval']
+        float_keys = ['connect_timeout', 'read_timeout', 'backoff_base', 'backoff_max', 'schedule_min_interval']
+
         # Dictionary to hold the parsed configuration
         parsed_config = {}
 
         for section in config.sections():
             parsed_config[section] = {}
             for key in config[section]:
-                if key in boolean_keys:
-                    # Use getboolean() for known boolean keys
-                    parsed_config[section][key] = config.getboolean(section, key)
-                else:
-                    # Keep other values as strings
-                    parsed_config[section][key] = config.get(section, key)
+                try:
+                    if key in boolean_keys:
+                        # Use getboolean() for known boolean keys
+                        parsed_config[section][key] = config.getboolean(section, key)
+                    elif key in integer_keys:
+                        parsed_config[section][key] = config.getint(section, key)
+                    elif key in float_keys:
+                        parsed_config[section][key] = config.getfloat(section, key)
+                    else:
+                        # Keep other values as strings
+                        parsed_config[section][key] = config.get(section, key)
+                except ValueError:
+                    raise Exception(f"Invalid value for '{key}' in [{section}] of config.ini: {config.get(section, key)}")
 
         return parsed_config
 
@@ -50,7 +82,74 @@ class GlobalSettings:
         custom_fields_path = resolve_path('custom_fields.json')
 
         if not os.path.exists(custom_fields_path):
-            raise Exception("custom_fields.json not found. Please create it at:", custom_fields_path)
-        
+            raise Exception(f"custom_fields.json not found. Please create it at: {custom_fields_path}")
+
         with open(custom_fields_path, 'r') as file:
-            return json.load(file)
+            try:
+                return json.load(file)
+            except json.JSONDecodeError as e:
+                raise Exception(f"custom_fields.json is not valid JSON: {e}")
+
+    def validate(self, config, custom_fields):
+        """Check both files up front so a sync doesn't fail halfway with a KeyError."""
+        errors = []
+
+        required = dict(REQUIRED_CONFIG_KEYS)
+        if config.get('GENERAL', {}).get('pyitagent_asset_monitor_collection', False):
+            required['DEFAULTS'] = required['DEFAULTS'] + ['snipeit_monitor_category_id', 'snipeit_monitor_fieldset_id']
+        if config.get('DEBUGGING', {}).get('slack_logging', False) or config.get('DEBUGGING', {}).get('slack_run_report', False):
+            required['DEBUGGING'] = required['DEBUGGING'] + ['slack_webhook']
+        for section, keys in required.items():
+            if section not in config:
+                errors.append(f"config.ini is missing the [{section}] section")
+                continue
+            for key in keys:
+                if key not in config[section]:
+                    errors.append(f"config.ini is missing '{key}' in [{section}]")
+
+        if not isinstance(custom_fields, dict):
+            errors.append("custom_fields.json must contain a JSON object")
+            custom_fields = {}
+        for section, required_keys in (('enabled_static_fields', ['enabled', 'field_name']), ('custom_fields', ['enabled', 'ps_command'])):
+            if not isinstance(custom_fields.get(section), dict):
+                errors.append(f"custom_fields.json is missing the '{section}' section")
+                continue
+            for field, value in custom_fields[section].items():
+                for key in required_keys:
+                    if not isinstance(value, dict) or key not in value:
+                        errors.append(f"custom_fields.json field '{field}' in '{section}' is missing '{key}'")
+        monitor_fields = custom_fields.get('monitor_fields', {}).get('custom_fields', {})
+        for field, value in monitor_fields.items():
+            for key in ('enabled', 'ps_command'):
+                if not isinstance(value, dict) or key not in value:
+                    errors.append(f"custom_fields.json monitor field '{field}' is missing '{key}'")
+
+        if errors:
+            raise Exception("Invalid configuration:\n" + "\n".join(errors))
+
+def freeze(value):
+    # Turn the parsed settings read-only so they can safely be shared for the whole process
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+_settings = None
+_settings_lock = threading.Lock()
+
+def get_settings():
+    """Return the process wide settings, config.ini and custom_fields.json are parsed on first use only."""
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = GlobalSettings()
+        return _settings
+
+def reload_settings():
+    """Parse the settings again, but only if either file changed on disk since they were loaded."""
+    global _settings
+    with _settings_lock:
+        if _settings is None or _settings.get_mtimes() != _settings.mtimes:
+            _settings = GlobalSettings()
+        return _settings
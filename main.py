@@ -1,19 +1,79 @@
 # main.py
 
-from runtime.client import PyITAgent
+import argparse
+import signal
+from runtime.scheduler import Scheduler
+from collectors.registry import get_collector, create_collector, set_collector
+from config.settings import get_settings
 from utils.exception import ExceptionHandler
+from api.fingerprint import set_full_sync
 import config.constants as c
 
 __author__ = c.AUTHOR
 __version__ = c.VERSION
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=c.DESCRIPTION)
+    parser.add_argument('--full-sync', action='store_true', help='Send every field, even those unchanged since the last sync')
+    parser.add_argument('--async', dest='async_pipeline', action='store_true', default=None, help='Sync the computer and its monitors concurrently')
+    parser.add_argument('--schedule', dest='scheduled', action='store_true', default=None, help='Wait for this host\'s splay and skip the run if it synced recently')
+    parser.add_argument('--now', action='store_true', help='Sync right away, ignoring the schedule')
+    parser.add_argument('--daemon', action='store_true', default=None, help='Stay resident and sync again every interval')
+    parser.add_argument('--interval', type=int, help='Seconds between syncs in daemon mode, overrides daemon_interval')
+    parser.add_argument('--cycles', type=int, help='Stop the daemon after this many syncs, eg. when testing')
+    parser.add_argument('--collector', help='Collector backend to use (powershell, wmi, linux or fixture), overrides collector')
+    parser.add_argument('--record', metavar='PATH', help='Record everything collected to a fixture file')
+    # Ignore anything we don't know about, the Task Scheduler action may pass extra arguments
+    arguments, _ = parser.parse_known_args()
+    return arguments
+
+def run_daemon(arguments, scheduler):
+    from runtime.daemon import Daemon
+    # The first cycle still waits for the splay of this host, so restarting a fleet doesn't spike the server
+    daemon = Daemon(interval=arguments.interval, async_pipeline=arguments.async_pipeline, delay=scheduler.splay() if scheduler else 0)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.run(max_cycles=arguments.cycles)
+    except KeyboardInterrupt:
+        daemon.stop()
+
 def main():
+    arguments = parse_arguments()
+    recorder = None
     try:
-        pyitagent = PyITAgent()
+        set_full_sync(arguments.full_sync)
+        if arguments.collector:
+            set_collector(create_collector(arguments.collector))
+        if arguments.record:
+            from collectors.fixture import RecordingCollector
+            recorder = RecordingCollector(get_collector(), arguments.record)
+            set_collector(recorder)
+        general = get_settings().config['GENERAL']
+        scheduled = arguments.scheduled
+        if scheduled is None:
+            scheduled = general.get('scheduled', False)
+        scheduler = Scheduler() if scheduled and not arguments.now else None
+        if arguments.daemon or (arguments.daemon is None and general.get('daemon', False)):
+            return run_daemon(arguments, scheduler)
+        if scheduler is not None and not scheduler.wait():
+            return
+        # The agent pulls in requests and the asset models, a run skipped by the scheduler never needs them
+        from runtime.client import PyITAgent
+        pyitagent = PyITAgent(async_pipeline=arguments.async_pipeline)
         pyitagent.runtime()
+        if scheduler is not None:
+            # Updates which only reached the spool aren't synced, the next run has to replay them
+            from api.spool import get_spool
+            if get_spool().pending():
+                print("Some updates were spooled, not recording this run as synced")
+            else:
+                scheduler.record_sync()
     except Exception as e:
         handler = ExceptionHandler()  # Create an instance
         handler.raise_for_error(e)  # Call the instance method
+    finally:
+        if recorder is not None:
+            recorder.save()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,60 @@
+# disks.py
+
+GB = 1024 ** 3
+
+# Win32_DiskDrive media type of the internal disks we report on
+FIXED_MEDIA_TYPE = 'Fixed hard disk media'
+
+# Volume the operating system is installed on, Windows and Linux
+SYSTEM_VOLUMES = ('C:', '/')
+
+def round_gb(size):
+    return round((size or 0) / GB, 2)
+
+def format_gb(value):
+    # Mirror how PowerShell prints a rounded number, eg. 476.94 or 500
+    return ('%.2f' % value).rstrip('0').rstrip('.')
+
+class DiskInventory:
+    """A structured snapshot of the physical disks and fixed volumes, taken once per run.
+
+    Built from the 'disks' and 'volumes' entries of the inventory snapshot, every
+    storage field is derived from it instead of querying WMI again.
+    """
+
+    def __init__(self, disks, volumes):
+        # Physical disks: media_type, model, serial and size in bytes
+        self.disks = [disk for disk in disks or [] if isinstance(disk, dict)]
+        # Fixed volumes (DriveType 3): device_id, size and free space in bytes
+        self.volumes = [volume for volume in volumes or [] if isinstance(volume, dict)]
+
+    @classmethod
+    def from_inventory(cls, inventory):
+        return cls(inventory.get('disks', []), inventory.get('volumes', []))
+
+    def fixed_disks(self):
+        return [disk for disk in self.disks if disk.get('media_type') == FIXED_MEDIA_TYPE]
+
+    def total_storage(self):
+        """Size of all fixed disks together, in GB."""
+        return round(sum((disk.get('size') or 0) for disk in self.fixed_disks()) / GB, 2)
+
+    def storage_information(self):
+        """One line per fixed disk with its media type, model, serial number and size."""
+        return "\n".join(f"{disk.get('media_type')} - {disk.get('model')} - {disk.get('serial')} - {format_gb(round_gb(disk.get('size')))} GB"
+                         for disk in self.fixed_disks())
+
+    def used_space(self, volume):
+        return (volume.get('size') or 0) - (volume.get('free') or 0)
+
+    def disk_space_used(self):
+        """Used space of the system volume (C:), in GB."""
+        return round(sum(self.used_space(volume) for volume in self.volumes if volume.get('device_id') in SYSTEM_VOLUMES) / GB, 2)
+
+    def volume_usage(self):
+        """Used and total space per fixed volume, in GB, eg. {'C:': (201.37, 476.2)}."""
+        return {volume.get('device_id'): (round_gb(self.used_space(volume)), round_gb(volume.get('size'))) for volume in self.volumes}
+
+    def volume_information(self):
+        """One line per fixed volume with its used and total space."""
+        return "\n".join(f"{device_id} - {format_gb(used)} GB used of {format_gb(size)} GB" for device_id, (used, size) in self.volume_usage().items())
@@ -1,7 +1,5 @@
 # edgecases.py
 
-from utils.common import run_command
-
 def manufacturer_fixes(manufacturer):
     # Specific case for HP and Hewlett-Packard
     match manufacturer:
@@ -1,61 +1,90 @@
 # hardware.py
 
-from utils.common import run_command, format_number
-from api.handler import resolve_payload, send_request
+from functools import cached_property
+
+from utils.common import format_number
+from utils.probe import as_text
+from collectors.registry import get_collector
+from api.handler import resolve_payload, send_request, created_id
+from api.fingerprint import get_sync_state
+from api.spool import send_or_spool, get_spool, SpooledError
+from api.cache import get_cache, is_not_found, is_missing, invalidate_rejected
 from models.assets.edgecases import hardware_fixes
-from config.settings import GlobalSettings
+from models.assets.disks import DiskInventory
+from models.assets.inventory import IDENTITY_FIELDS
+from config.settings import get_settings
 import config.constants as c
 
 class Hardware:
-    def __init__(self):
+    def __init__(self, inventory):
+        self.inventory = inventory
         self.collected_hardware = {}
         self.disk_size = None
         self.disk_info = None
         self.disk_used = None
-        self.serial_number = self.determine_serial_number()
+
+    @cached_property
+    def serial_number(self):
+        return self.determine_serial_number()
+
+    @cached_property
+    def disks(self):
+        # Every storage field comes from the same snapshot of disks and volumes
+        return DiskInventory.from_inventory(self.inventory)
 
     def determine_serial_number(self):
         # Use BIOS serial number which is more reliable across manufacturers
-        serial_number = run_command("(gwmi win32_bios).serialnumber")
+        serial_number = self.inventory.get('serial_number')
         return serial_number
 
     def collect_hardware_data(self):
-        static_fields = GlobalSettings().custom_fields["enabled_static_fields"]
+        static_fields = get_settings().custom_fields["enabled_static_fields"]
         for field, value in static_fields.items():
             if value["enabled"]:
                 match field:
-                    case "mac_address": self.collected_hardware[value["field_name"]] = run_command("(Get-WmiObject Win32_NetworkAdapterConfiguration | Where-Object {$_.IPEnabled -eq $true} | Select-Object -First 1).MACAddress")
+                    case "mac_address": self.collected_hardware[value["field_name"]] = self.inventory.get('mac_address')
                     case "total_storage" | "storage_information" | "disk_space_used":
-                        self.disk_size, self.disk_info, self.disk_used = self.determine_disk_info()
+                        if self.disk_size is None:
+                            self.disk_size, self.disk_info, self.disk_used = self.determine_disk_info()
                         if field == "total_storage":
-                            self.collected_hardware[value["field_name"]] = format_number(self.disk_size)
+                            self.collected_hardware[value["field_name"]] = format_number(str(self.disk_size))
                         elif field == "storage_information":
                             self.collected_hardware[value["field_name"]] = self.disk_info
                         elif field == "disk_space_used":
-                            self.collected_hardware[value["field_name"]] = format_number(self.disk_used)
+                            self.collected_hardware[value["field_name"]] = format_number(str(self.disk_used))
+                    case "volume_usage": self.collected_hardware[value["field_name"]] = self.disks.volume_information()
                     case "pyitagent_version": self.collected_hardware[value["field_name"]] = c.VERSION
-        dynamic_fields = GlobalSettings().custom_fields["custom_fields"]
-        for field, value in dynamic_fields.items():
-            if value["enabled"] is False:
+        dynamic_fields = get_settings().custom_fields["custom_fields"]
+        general = get_settings().config['GENERAL']
+        probe_timeout = general.get('probe_timeout', 30)
+        enabled_fields = [(field, value) for field, value in dynamic_fields.items() if value["enabled"] is not False]
+        # Run the probes concurrently, results come back in the same order as the fields
+        results = get_collector().probes([(value["ps_command"], value.get("timeout", probe_timeout)) for field, value in enabled_fields],
+                             max_workers=general.get('probe_workers', 4))
+        for (field, value), result in zip(enabled_fields, results):
+            if not result.ok:
+                # Don't overwrite the value in Snipe-IT with a blank because the probe failed
+                print(f"Failed to collect {field}: {result.stderr or 'timed out'}")
                 continue
-            result = run_command(value["ps_command"])
-            if value["float_number"] is True: result = format_number(result)
-            self.collected_hardware[field] = result
+            if value.get("float_number", False) is True: self.collected_hardware[field] = format_number(result.value)
+            else: self.collected_hardware[field] = as_text(result.value)
 
     def determine_disk_info(self):
-        disk_size = run_command("""
-        $total=0
-        (Get-WmiObject -Class Win32_DiskDrive | Where-Object { $_.MediaType -eq 'Fixed hard disk media' }).Size | foreach-object { $total=$total+$_/1gb }
-        [Math]::Round($total, 2)
-        """)
-        disk_info = run_command("""
-        (Get-WmiObject -Class Win32_DiskDrive | Where-Object { $_.MediaType -eq 'Fixed hard disk media' }) | ForEach-Object{
-            echo "$($_.MediaType) - $($_.Model) - $($_.SerialNumber) - $([Math]::Round($_.Size/1gb,2)) GB"
-        }
-        """)
-        disk_used = run_command("[Math]::Round(((Get-WmiObject Win32_LogicalDisk -Filter \"DeviceID='C:'\").Size - (Get-WmiObject Win32_LogicalDisk -Filter \"DeviceID='C:'\").FreeSpace) / 1GB, 2)")
+        disk_size = self.disks.total_storage()
+        disk_info = self.disks.storage_information()
+        disk_used = self.disks.disk_space_used()
         return disk_size, disk_info, disk_used
 
+    def spool_unresolved(self, manufacturer_name, metadata, error):
+        """Spool the collected data when Snipe-IT went away before the asset could be looked up."""
+        if not self.collected_hardware:
+            self.collect_hardware_data()
+        serial_number = hardware_fixes(self.inventory.get('serial_number'), metadata, {'manufacturer_name': manufacturer_name})
+        # The raw inventory, the fixes are applied again when it's replayed
+        inventory = {field: self.inventory.get(field) for field in IDENTITY_FIELDS}
+        get_spool().append('SYNC', 'hardware', self.collected_hardware, serial_number, inventory=inventory)
+        print(f"Snipe-IT could not be reached, the data of {serial_number} was spooled: {error}")
+
     def post_hardware(self, serial_number, model_id, hostname, status_id, company_id):
         endpoint = 'hardware'
         values = {
@@ -66,13 +95,22 @@ class Hardware:
         payload = resolve_payload("hardware", values, self.collected_hardware)
         payload['company_id'] = company_id
         payload['status_id'] = status_id
-        response = send_request('POST', endpoint, payload=payload)
+        response = send_or_spool('POST', endpoint, payload, key=serial_number)
         if response.get('status') == 'success':
-            return True
+            hardware_id = created_id(response)
+            if hardware_id is not None:
+                get_cache().set('hardware', serial_number, hardware_id)
+                get_sync_state().record(hardware_id, payload)
+            return hardware_id
         else:
+            # A cached model ID which was deleted in Snipe-IT fails validation, look it up again on the next run
+            invalidate_rejected(response.get('messages'), payload)
             raise Exception(f"Failed to post hardware: {response.get('messages')}")
 
     def get_hardware(self, serial_number):
+        cached_id = get_cache().get('hardware', serial_number)
+        if cached_id is not None:
+            return cached_id
         endpoint = f'hardware/byserial/{serial_number}?deleted=false'
         response = send_request('GET', endpoint)
         # Check for API error response
@@ -84,6 +122,7 @@ class Hardware:
             try:
                 res_handler = response['rows'][0]
                 if res_handler['serial'] == serial_number:
+                    get_cache().set('hardware', serial_number, res_handler['id'])
                     return response['rows'][0]['id']
                 else: return None
             except (KeyError, IndexError):
@@ -99,25 +138,58 @@ class Hardware:
             'model_id': model_id
         }
         payload = resolve_payload("hardware", values, self.collected_hardware)
-        response = send_request('PATCH', endpoint, payload=payload)
+        # Only send the fields which changed since the last successful sync
+        changes = get_sync_state().changes(hardware_id, payload)
+        if not changes:
+            print("No changes since the last sync, skipping update")
+            return True
+        # The full payload is spooled, the fingerprints may be stale by the time it's replayed
+        response = send_or_spool('PATCH', endpoint, changes, key=serial_number, spool_payload=payload, hardware_id=hardware_id)
         if response.get('status') == 'success':
+            get_sync_state().record(hardware_id, payload)
             return True
         else:
             print(f"Failed to update hardware: {response.get('messages')}")
+            invalidate_rejected(response.get('messages'), changes)
+            if is_missing(response):
+                # The cached asset ID belongs to a deleted asset, look the serial number up again next time
+                get_cache().invalidate('hardware', serial_number)
             return False
     
     def get_or_create_hardware(self, metadata, hardware):
-        update_hardware = True
         self.serial_number = hardware_fixes(self.serial_number, metadata, hardware)
-        self.collect_hardware_data()
+        # The data may already have been collected ahead of time by the async pipeline
+        if not self.collected_hardware:
+            self.collect_hardware_data()
         hardware_id = self.get_hardware(self.serial_number)
+        if hardware_id is not None:
+            print("Patching hardware")
+            try:
+                success = self.patch_hardware(hardware_id, self.serial_number, metadata['model_id'], metadata['hostname'])
+                if not success:
+                    # Send every field again on the next run
+                    get_sync_state().forget(hardware_id)
+            except SpooledError as e:
+                print(e)
+                return hardware_id, self.collected_hardware
+            except Exception as e:
+                if not is_not_found(e):
+                    raise
+                # The cached asset ID no longer exists, look the serial number up again
+                print("Hardware not found, looking it up again")
+                get_cache().invalidate('hardware', self.serial_number)
+                get_sync_state().forget(hardware_id)
+                hardware_id = self.get_hardware(self.serial_number)
+                if hardware_id is not None:
+                    self.patch_hardware(hardware_id, self.serial_number, metadata['model_id'], metadata['hostname'])
         if hardware_id is None:
             print("Creating new hardware")
-            update_hardware = False
-            success = self.post_hardware(self.serial_number, metadata['model_id'], metadata['hostname'], GlobalSettings().config['DEFAULTS']['snipeit_status_id'], GlobalSettings().config['DEFAULTS']['snipeit_company_id'])
-            if success:
+            try:
+                hardware_id = self.post_hardware(self.serial_number, metadata['model_id'], metadata['hostname'], get_settings().config['DEFAULTS']['snipeit_status_id'], get_settings().config['DEFAULTS']['snipeit_company_id'])
+            except SpooledError as e:
+                print(e)
+                return None, self.collected_hardware
+            if hardware_id is None:
+                # Only look it up again if the response didn't include the new ID
                 hardware_id = self.get_hardware(self.serial_number)
-        if update_hardware:
-            print("Patching hardware")
-            self.patch_hardware(hardware_id, self.serial_number, metadata['model_id'], metadata['hostname'])
-        return hardware_id, self.collected_hardware
\ No newline at end of file
+        return hardware_id, self.collected_hardware
@@ -0,0 +1,61 @@
+# inventory.py
+
+import threading
+from functools import cached_property
+
+from collectors.base import INVENTORY_FIELDS
+from collectors.registry import get_collector
+from config.settings import get_settings
+
+# Fields which are always needed to identify the computer
+IDENTITY_FIELDS = ['manufacturer', 'model', 'model_number', 'serial_number', 'hostname']
+
+# Static fields which are all derived from the disk snapshot
+DISK_FIELDS = ['total_storage', 'storage_information', 'disk_space_used', 'volume_usage']
+
+class Inventory:
+    """Collects every static field in a single call to the collector backend.
+
+    With PowerShell each WMI class is queried once and all values come back in one
+    round trip, the snapshot is taken on first access and reused for the rest of the run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """An inventory of values collected earlier, eg. on a run whose data was spooled."""
+        inventory = cls()
+        inventory.__dict__['snapshot'] = dict(snapshot)
+        return inventory
+
+    def enabled_fields(self):
+        fields = list(IDENTITY_FIELDS)
+        static_fields = get_settings().custom_fields["enabled_static_fields"]
+        for field, value in static_fields.items():
+            if not value["enabled"]:
+                continue
+            for query in (['disks', 'volumes'] if field in DISK_FIELDS else [field]):
+                if query in INVENTORY_FIELDS and query not in fields:
+                    fields.append(query)
+        return fields
+
+    @cached_property
+    def snapshot(self):
+        # The async pipeline may ask for it from several threads at once, take it only once
+        with self._lock:
+            if 'snapshot' in self.__dict__:
+                return self.__dict__['snapshot']
+            snapshot = get_collector().inventory(self.enabled_fields())
+            # Strip strings the same way command output always was
+            return {field: value.strip() if isinstance(value, str) else value for field, value in snapshot.items()}
+
+    def collect(self):
+        """Take a fresh snapshot, replacing the one cached for this run."""
+        self.__dict__.pop('snapshot', None)
+        return self.snapshot
+
+    def get(self, field, default=""):
+        value = self.snapshot.get(field)
+        return default if value is None else value
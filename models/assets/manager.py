@@ -1,15 +1,46 @@
 # manager.py
 
+from functools import cached_property
+
 from .manufacturer import Manufacturer
 from .model import Model
 from .hardware import Hardware
 from .monitor import Monitor
+from .inventory import Inventory
+from .registry import ResolutionRegistry
 
 class AssetManager:
-    def __init__(self):
-        self.manufacturer = Manufacturer()
-        self.model = Model()
-        self.hardware = Hardware()
-        self.monitor = Monitor()
+    # The assets are built on first access and collect nothing until their data is asked for,
+    # so a disabled computer or monitor sync costs nothing
+    def __init__(self, inventory=None):
+        self.inventory = inventory or Inventory()
+        self.registry = ResolutionRegistry()  # Shared so every manufacturer and model is resolved once per run
+
+    @cached_property
+    def manufacturer(self):
+        return Manufacturer(self.inventory, self.registry)
+
+    @cached_property
+    def model(self):
+        return Model(self.inventory, self.registry)
+
+    @cached_property
+    def hardware(self):
+        return Hardware(self.inventory)
+
+    @cached_property
+    def monitor(self):
+        return Monitor(self.registry)
+
+    # Additional asset management methods...
 
-    # Additional asset management methods...
\ No newline at end of file
+def replay_unresolved(entry):
+    """Resolve and send a computer which was spooled before Snipe-IT could be asked for its IDs."""
+    asset_manager = AssetManager(Inventory.from_snapshot(entry['inventory']))
+    metadata = {'hostname': asset_manager.inventory.get('hostname')}
+    hardware = {}
+    metadata['manufacturer_id'], hardware['manufacturer_name'] = asset_manager.manufacturer.get_or_create_manufacturer()
+    metadata['model_id'], hardware['model_number'], hardware['model'] = asset_manager.model.get_or_create_model(metadata, hardware)
+    # The custom fields were collected on the run which spooled them
+    asset_manager.hardware.collected_hardware = dict(entry['payload'])
+    return asset_manager.hardware.get_or_create_hardware(metadata, hardware)[0]
\ No newline at end of file
@@ -1,18 +1,28 @@
 # manufactuer.py
 
-from utils.common import run_command
-from api.handler import resolve_payload, send_request
+from functools import cached_property
+
+from api.handler import resolve_payload, send_request, created_id
+from api.cache import get_cache
 from models.assets.edgecases import manufacturer_fixes
 
 class Manufacturer:
-    def __init__(self):
-        self.manufacturer_name = self.determine_manufacturer()
+    def __init__(self, inventory, registry):
+        self.inventory = inventory
+        self.registry = registry
+
+    @cached_property
+    def manufacturer_name(self):
+        return self.determine_manufacturer()
 
     def determine_manufacturer(self):
-        manufacturer = run_command("(gwmi win32_computersystem).manufacturer")
+        manufacturer = self.inventory.get('manufacturer')
         return manufacturer_fixes(manufacturer)
     
     def get_manufacturer(self, manufacturer_name):
+        cached_id = get_cache().get('manufacturer', manufacturer_name)
+        if cached_id is not None:
+            return cached_id
         endpoint = f'manufacturers?name={manufacturer_name}'
         response = send_request('GET', endpoint)
         # Check for API error response
@@ -24,6 +34,7 @@ class Manufacturer:
             try:
                 res_handler = response['rows'][0]
                 if res_handler['name'] == manufacturer_name:
+                    get_cache().set('manufacturer', manufacturer_name, res_handler['id'])
                     return response['rows'][0]['id']
                 else: return None
             except (KeyError, IndexError):
@@ -39,15 +50,22 @@ class Manufacturer:
         payload = resolve_payload("manufacturer", values)
         response = send_request('POST', endpoint, payload=payload)
         if response.get('status') == 'success':
-            return True
+            manufacturer_id = created_id(response)
+            get_cache().set('manufacturer', manufacturer_name, manufacturer_id)
+            return manufacturer_id
         else:
             raise Exception(f"Failed to post manufacturer: {response.get('messages')}")
 
-    def get_or_create_manufacturer(self):
+    def resolve_manufacturer(self):
         manufacturer_id = self.get_manufacturer(self.manufacturer_name)
         if manufacturer_id is None:
             print("Creating new manufacturer")
-            success = self.post_manufacturer(self.manufacturer_name)
-            if success:
+            manufacturer_id = self.post_manufacturer(self.manufacturer_name)
+            if manufacturer_id is None:
+                # Only look it up again if the response didn't include the new ID
                 manufacturer_id = self.get_manufacturer(self.manufacturer_name)
+        return manufacturer_id
+
+    def get_or_create_manufacturer(self):
+        manufacturer_id = self.registry.resolve(('manufacturer', self.manufacturer_name), self.resolve_manufacturer)
         return manufacturer_id, self.manufacturer_name
\ No newline at end of file
@@ -1,17 +1,29 @@
 # model.py
 
-from utils.common import run_command
-from api.handler import resolve_payload, send_request
-from config.settings import GlobalSettings
+from functools import cached_property
+
+from api.handler import resolve_payload, send_request, created_id
+from api.cache import get_cache, model_key, invalidate_rejected
+from config.settings import get_settings
 from models.assets.edgecases import model_fixes
 
 class Model:
-    def __init__(self):
-        self.model_number, self.model = self.determine_model_info()
+    def __init__(self, inventory, registry):
+        self.inventory = inventory
+        self.registry = registry
+
+    # Read from the inventory on first use, get_or_create_model replaces them with the fixed up values
+    @cached_property
+    def model_number(self):
+        return self.determine_model_info()[0]
+
+    @cached_property
+    def model(self):
+        return self.determine_model_info()[1]
 
     def determine_model_info(self):
-        model_number = run_command("(gwmi win32_baseboard).product")
-        model = run_command("(Get-WmiObject -Class:Win32_ComputerSystem).Model")
+        model_number = self.inventory.get('model_number')
+        model = self.inventory.get('model')
         return model_number, model
     
     def post_model(self, manufacturer_id, category_id = 3, fieldset_id = 1):
@@ -26,11 +38,17 @@ class Model:
         payload = resolve_payload("model", values)
         response = send_request('POST', endpoint, payload=payload)
         if response.get('status') == 'success':
-            return True
+            model_id = created_id(response)
+            get_cache().set('model', model_key(self.model, manufacturer_id), model_id)
+            return model_id
         else:
+            invalidate_rejected(response.get('messages'), payload)
             raise Exception(f"Failed to post model: {response.get('messages')}")
 
-    def get_model(self, model_name):
+    def get_model(self, model_name, manufacturer_id=None):
+        cached_id = get_cache().get('model', model_key(model_name, manufacturer_id))
+        if cached_id is not None:
+            return cached_id
         endpoint = f'models?limit=1&search={model_name}&sort=name&order=asc'
         response = send_request('GET', endpoint)
         # Check for API error response
@@ -42,6 +60,7 @@ class Model:
             try:
                 res_handler = response['rows'][0]
                 if res_handler['name'] == model_name:
+                    get_cache().set('model', model_key(model_name, manufacturer_id), res_handler['id'])
                     return response['rows'][0]['id']
                 else: return None
             except (KeyError, IndexError):
@@ -49,12 +68,18 @@ class Model:
         else:
             return None
     
-    def get_or_create_model(self, metadata, hardware):
-        model_id = self.get_model(self.model)
+    def resolve_model(self, manufacturer_id):
+        model_id = self.get_model(self.model, manufacturer_id)
         if model_id is None:
             print("Creating new model")
-            success = self.post_model(metadata['manufacturer_id'], GlobalSettings().config['DEFAULTS']['snipeit_category_id'], GlobalSettings().config['DEFAULTS']['snipeit_fieldset_id'])
-            if success:
-                model_id = self.get_model(self.model)
+            model_id = self.post_model(manufacturer_id, get_settings().config['DEFAULTS']['snipeit_category_id'], get_settings().config['DEFAULTS']['snipeit_fieldset_id'])
+            if model_id is None:
+                # Only look it up again if the response didn't include the new ID
+                model_id = self.get_model(self.model, manufacturer_id)
+        return model_id
+
+    def get_or_create_model(self, metadata, hardware):
+        manufacturer_id = metadata['manufacturer_id']
+        model_id = self.registry.resolve(('model', self.model, manufacturer_id), lambda: self.resolve_model(manufacturer_id))
         self.model_number, self.model = model_fixes(hardware, self.model, self.model_number)
         return model_id, self.model_number, self.model
\ No newline at end of file
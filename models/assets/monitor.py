@@ -1,213 +1,92 @@
 # monitor.py
 
-from utils.common import run_command, format_number
-from api.handler import resolve_payload, send_request
-from config.settings import GlobalSettings
+from functools import cached_property
+
+from utils.common import format_number
+from utils.probe import as_text
+from collectors.registry import get_collector
+from collectors.base import monitor_property, property_key
+from api.handler import resolve_payload, send_request, created_id
+from api.fingerprint import get_sync_state
+from api.spool import send_or_spool
+from api.cache import get_cache, model_key, is_not_found, is_missing, invalidate_rejected
+from config.settings import get_settings
 import config.constants as c
-import base64
-import binascii
 
 class Monitor:
-    def __init__(self):
-        self.monitors = []
-        self.collected_monitors = []
-        self.detect_monitors()
+    def __init__(self, registry):
+        self.registry = registry
+
+    # Detected and collected on first use, then kept for the rest of the run
+    @cached_property
+    def monitors(self):
+        return self.detect_monitors()
+
+    @cached_property
+    def collected_monitors(self):
+        return self.collect_monitor_data()
 
     def detect_monitors(self):
         """Detect all connected monitors and their basic information."""
         # First, detect if this is a laptop/notebook
         is_laptop = False
         try:
-            chassis_type = run_command("(Get-WmiObject -Class Win32_SystemEnclosure).ChassisTypes")
+            chassis_types = [str(chassis_type) for chassis_type in get_collector().chassis_types()]
             # ChassisTypes values for laptops are typically 8, 9, 10, 11, 12, 14, 18, 21, 30, 31 or 32
             laptop_chassis_types = ['8', '9', '10', '11', '12', '14', '18', '21', '30', '31', '32']
-            if any(laptop_type in chassis_type for laptop_type in laptop_chassis_types):
+            if any(laptop_type in chassis_types for laptop_type in laptop_chassis_types):
                 is_laptop = True
                 print("System detected as laptop/notebook")
         except Exception as e:
             print(f"Could not determine if system is a laptop: {e}")
         
-        # Use our enhanced PowerShell script to get detailed monitor information
-        ps_script = """
-        function Get-MonitorDetails {
-            [CmdletBinding()]
-            param()
+        # Ask the collector backend for every connected monitor and its EDID details, along with the
+        # properties the monitor custom fields read so root\wmi is enumerated only once
+        parsed_monitors = get_collector().monitors(list(dict.fromkeys(self.monitor_properties().values())))
+        
+        # Filter out laptop built-in displays if on a laptop, the collector tells them apart by their connection
+        filtered_monitors = []
+        for monitor in parsed_monitors:
+            if is_laptop and monitor.get('IsInternalDisplay', False):
+                print(f"Skipping built-in laptop display: {monitor.get('Manufacturer')} {monitor.get('Model')}")
+                continue
 
-            # Define a helper function to convert hex-encoded names to readable strings
-            function ConvertFrom-HexName {
-                param([byte[]] $HexName)
-                if ($null -eq $HexName -or $HexName.Length -eq 0) { return "Unknown" }
-                # Remove any trailing zeros and convert to ASCII
-                return [System.Text.Encoding]::ASCII.GetString($HexName -ne 0)
-            }
+            # If model is still unknown, create a generic name based on screen size
+            if monitor.get('Model') == "Unknown" and monitor.get('ScreenSizeInches') != "Unknown":
+                monitor['Model'] = f"{monitor.get('ScreenSizeInches')}\" Display Monitor"
 
-            # Get monitor information from WMI
-            $monitors = @()
-            $monitorIds = Get-WmiObject -Namespace root\wmi -Class WmiMonitorID
-            $displayParams = Get-WmiObject -Namespace root\wmi -Class WmiMonitorBasicDisplayParams
-            $connections = Get-WmiObject -Namespace root\wmi -Class WmiMonitorConnectionParams
+            # Monitors without any serial, not even the numeric one in the EDID, can't be told apart
+            if not monitor.get('SerialNumber') or monitor.get('SerialNumber') == "0" or len(monitor.get('SerialNumber', '')) < 2:
+                monitor['SerialNumber'] = "Unknown"
 
-            foreach ($monitor in $monitorIds) {
-                # Get matching display parameters
-                $displayParam = $displayParams | Where-Object { $_.InstanceName -eq $monitor.InstanceName }
-                $connection = $connections | Where-Object { $_.InstanceName -eq $monitor.InstanceName }
-                
-                # Try to detect if this is an internal laptop display
-                $isInternalDisplay = $false
-                if ($connection) {
-                    # VideoOutputTechnology 0 typically means internal connection
-                    $isInternalDisplay = ($connection.VideoOutputTechnology -eq 0)
-                }
-                
-                # Extract manufacturer - properly handle common three-letter codes
-                $rawManufacturer = ConvertFrom-HexName $monitor.ManufacturerName
-                $mappedManufacturer = switch ($rawManufacturer) {
-                    "DEL" { "Dell Inc." }
-                    "AUO" { "AUO Corporation" }
-                    "ACI" { "ASUS" }
-                    "ACR" { "Acer" }
-                    "HPN" { "HP" }
-                    "HWP" { "HP" }
-                    "LEN" { "Lenovo" }
-                    "SAM" { "Samsung" }
-                    "SEC" { "Samsung" }
-                    "LGD" { "LG Electronics" }
-                    "PHL" { "Philips" }
-                    "SNY" { "Sony" }
-                    "MSI" { "MSI" }
-                    "BNQ" { "BenQ" }
-                    "AOC" { "AOC" }
-                    "NEC" { "NEC" }
-                    "VSC" { "ViewSonic" }
-                    default { $rawManufacturer }
-                }
-                
-                # Extract model - look for complete model name
-                $model = ConvertFrom-HexName $monitor.UserFriendlyName
-                # If model is still "Unknown", try the product ID
-                if ($model -eq "Unknown" -and $monitor.ProductCodeID) {
-                    $model = ConvertFrom-HexName $monitor.ProductCodeID
-                }
-                
-                # Extract serial number
-                $serial = ConvertFrom-HexName $monitor.SerialNumberID
-                
-                # Calculate screen size in inches (approximate) if display parameters are available
-                $screenSize = "Unknown"
-                if ($displayParam) {
-                    $widthCm = $displayParam.MaxHorizontalImageSize / 10
-                    $heightCm = $displayParam.MaxVerticalImageSize / 10
-                    
-                    # Use Pythagorean theorem to calculate diagonal
-                    $diagonalCm = [Math]::Sqrt([Math]::Pow($widthCm, 2) + [Math]::Pow($heightCm, 2))
-                    
-                    # Convert to inches (1 inch = 2.54 cm)
-                    $diagonalInches = $diagonalCm / 2.54
-                    
-                    # Round to 1 decimal place
-                    $screenSize = [Math]::Round($diagonalInches, 1)
-                }
-                
-                # Further determine if this is an internal laptop display
-                # Common laptop display manufacturers
-                $laptopDisplayManufacturers = @("LG Philips", "Samsung", "AU Optronics", "AUO", "Chi Mei", "BOE", "Innolux", "Sharp", "LGD")
-                if (-not $isInternalDisplay -and $model -match "LCD|Panel|Internal|Laptop|Notebook" -or $laptopDisplayManufacturers -contains $mappedManufacturer) {
-                    # Additional check if this might be an internal display
-                    $isInternalDisplay = $true
-                }
-                
-                # Create monitor object with all details
-                $monitorObj = [PSCustomObject]@{
-                    Manufacturer = $mappedManufacturer
-                    Model = $model
-                    SerialNumber = $serial
-                    YearOfManufacture = $monitor.YearOfManufacture
-                    WeekOfManufacture = $monitor.WeekOfManufacture
-                    InstanceName = $monitor.InstanceName
-                    ScreenWidth = if ($displayParam) { $displayParam.MaxHorizontalImageSize } else { 0 }
-                    ScreenHeight = if ($displayParam) { $displayParam.MaxVerticalImageSize } else { 0 }
-                    ScreenSizeInches = $screenSize
-                    IsActive = $monitor.Active
-                    IsInternalDisplay = $isInternalDisplay
-                    ConnectionType = if ($connection) { $connection.VideoOutputTechnology } else { "Unknown" }
-                }
-                
-                $monitors += $monitorObj
-            }
-            
-            # Return the collected monitor details as JSON
-            return $monitors | ConvertTo-Json -Depth 4
-        }
+            filtered_monitors.append(monitor)
 
-        # Run the function and return results
-        Get-MonitorDetails
-        """
-        
-        wmi_monitors = run_command(ps_script)
-        
-        try:
-            import json
-            # If multiple monitors are found, this will be a JSON array
-            # If single monitor is found, this will be a JSON object
-            parsed_monitors = json.loads(wmi_monitors)
-            
-            # Ensure we always have a list
-            if isinstance(parsed_monitors, dict):
-                parsed_monitors = [parsed_monitors]
-            
-            # Filter out laptop built-in displays if on a laptop
-            filtered_monitors = []
-            for monitor in parsed_monitors:
-                # Skip built-in displays on laptops
-                if is_laptop and monitor.get('IsInternalDisplay', False):
-                    print(f"Skipping built-in laptop display: {monitor.get('Manufacturer')} {monitor.get('Model')}")
-                    continue
-                    
-                # Additional checks for laptop internal displays
-                if is_laptop and (
-                    # Common patterns in laptop display names
-                    "internal" in monitor.get('Model', '').lower() or
-                    "built-in" in monitor.get('Model', '').lower() or
-                    "panel" in monitor.get('Model', '').lower() or
-                    # Connection type 0 is often internal
-                    monitor.get('ConnectionType') == 0 or
-                    # Manufacturers that typically make laptop displays
-                    monitor.get('Manufacturer') in ['LG Electronics', 'AUO Corporation', 'BOE', 'Innolux', 'Sharp', 'Chi Mei']
-                ):
-                    print(f"Skipping likely laptop display: {monitor.get('Manufacturer')} {monitor.get('Model')}")
-                    continue
-                
-                # If model is still unknown, create a generic name based on screen size
-                if monitor.get('Model') == "Unknown" and monitor.get('ScreenSizeInches') != "Unknown":
-                    monitor['Model'] = f"{monitor.get('ScreenSizeInches')}\" Display Monitor"
-                
-                # Clean up serial number (some monitors return "0" or very short values)
-                if not monitor.get('SerialNumber') or monitor.get('SerialNumber') == "0" or len(monitor.get('SerialNumber', '')) < 2:
-                    # Generate a unique identifier based on other properties if serial is missing
-                    if monitor.get('Model') != "Unknown":
-                        # Create a hash from the model name and screen dimensions as a pseudo-serial number
-                        import hashlib
-                        unique_str = f"{monitor.get('Manufacturer')}-{monitor.get('Model')}-{monitor.get('ScreenWidth')}x{monitor.get('ScreenHeight')}"
-                        # Generate a hash and take the first 10 characters as the serial
-                        hash_object = hashlib.md5(unique_str.encode())
-                        monitor['SerialNumber'] = f"GEN-{hash_object.hexdigest()[:10].upper()}"
-                    else:
-                        monitor['SerialNumber'] = "Unknown"
-                
-                filtered_monitors.append(monitor)
-            
-            # Update the monitors list with filtered results
-            self.monitors = filtered_monitors
-            
-            if len(filtered_monitors) == 0:
-                print("No external monitors detected for collection")
-                
-        except json.JSONDecodeError:
-            print(f"Error parsing monitor data: {wmi_monitors}")
-            self.monitors = []
+        if len(filtered_monitors) == 0:
+            print("No external monitors detected for collection")
+        return filtered_monitors
+
+    def monitor_properties(self):
+        """Map the enabled monitor custom fields which read a per-monitor WMI property to its (wmi_class, property)."""
+        properties = {}
+        dynamic_fields = get_settings().custom_fields.get("monitor_fields", {}).get("custom_fields", {})
+        for field, value in dynamic_fields.items():
+            if value["enabled"] is False:
+                continue
+            target = monitor_property(value["ps_command"])
+            if target:
+                properties[field] = target
+        return properties
 
     def collect_monitor_data(self):
         """Collect additional data for each detected monitor."""
+        collected_monitors = []
+        general = get_settings().config['GENERAL']
+        probe_timeout = general.get('probe_timeout', 30)
+        properties = self.monitor_properties()
+        probes = []
+        # Command -> its index in queued, a command which isn't per-monitor runs once for all monitors
+        commands = {}
+        queued = []
         for monitor in self.monitors:
             monitor_data = {
                 'manufacturer': monitor.get('Manufacturer', 'Unknown'),
@@ -219,7 +98,7 @@ class Monitor:
             collected_hardware = {}
             
             # Collect dynamic fields from custom_fields section
-            dynamic_fields = GlobalSettings().custom_fields.get("monitor_fields", {}).get("custom_fields", {})
+            dynamic_fields = get_settings().custom_fields.get("monitor_fields", {}).get("custom_fields", {})
             for field, value in dynamic_fields.items():
                 if value["enabled"] is False:
                     continue
@@ -227,6 +106,18 @@ class Monitor:
                 # Special handling for screen size - use calculated value from our script if available
                 if field == "_snipeit_screen_size_21" and monitor.get('ScreenSizeInches') != "Unknown":
                     result = str(monitor.get('ScreenSizeInches'))
+                    if value.get("float_number", False) is True:
+                        result = format_number(result)
+                    collected_hardware[field] = result
+                elif field in properties and property_key(*properties[field]) in monitor.get('Properties', {}):
+                    # Read from the snapshot the monitor detection took
+                    result = monitor['Properties'][property_key(*properties[field])]
+                    if result is None:
+                        print(f"Failed to collect {field}: no {properties[field][0]} for {monitor.get('InstanceName')}")
+                    elif value.get("float_number", False) is True:
+                        collected_hardware[field] = format_number(result)
+                    else:
+                        collected_hardware[field] = as_text(result)
                 else:
                     # Add the instance name to the command if available
                     instance_name = monitor.get('InstanceName')
@@ -236,12 +127,13 @@ class Monitor:
                         # For commands that need to target a specific monitor
                         ps_command = ps_command.replace('Select-Object -First 1', f'Where-Object {{ $_.InstanceName -eq "{instance_name}" }}')
                     
-                    result = run_command(ps_command)
+                    # Queue the probe, all monitors' probes are run concurrently below
+                    collected_hardware[field] = None
+                    if ps_command not in commands:
+                        commands[ps_command] = len(queued)
+                        queued.append((ps_command, value.get("timeout", probe_timeout)))
+                    probes.append((collected_hardware, field, value, commands[ps_command]))
                 
-                if value.get("float_number", False) is True:
-                    result = format_number(result)
-                collected_hardware[field] = result
-            
             # Also add manufacture year and week if available (even if not in custom fields)
             if monitor.get('YearOfManufacture'):
                 manufacture_date_field = next((field for field, value in dynamic_fields.items() 
@@ -263,10 +155,31 @@ class Monitor:
                     collected_hardware[dimensions_field] = f"{monitor.get('ScreenWidth')}x{monitor.get('ScreenHeight')} mm"
             
             monitor_data['collected_hardware'] = collected_hardware
-            self.collected_monitors.append(monitor_data)
+            collected_monitors.append(monitor_data)
+
+        # Merge the probe results back in the order the fields were queued
+        results = get_collector().probes(queued, max_workers=general.get('probe_workers', 4))
+        for collected_hardware, field, value, index in probes:
+            result = results[index]
+            # Keep values which were filled in from the detection data in the meantime
+            if collected_hardware[field] is not None:
+                continue
+            if not result.ok:
+                # Don't overwrite the value in Snipe-IT with a blank because the probe failed
+                print(f"Failed to collect {field}: {result.stderr or 'timed out'}")
+                del collected_hardware[field]
+                continue
+            if value.get("float_number", False) is True:
+                collected_hardware[field] = format_number(result.value)
+            else:
+                collected_hardware[field] = as_text(result.value)
+        return collected_monitors
 
     def get_manufacturer(self, manufacturer_name):
         """Get manufacturer ID from Snipe-IT."""
+        cached_id = get_cache().get('manufacturer', manufacturer_name)
+        if cached_id is not None:
+            return cached_id
         endpoint = f'manufacturers?name={manufacturer_name}'
         response = send_request('GET', endpoint)
         # Check for API error response
@@ -278,6 +191,7 @@ class Monitor:
             try:
                 res_handler = response['rows'][0]
                 if res_handler['name'] == manufacturer_name:
+                    get_cache().set('manufacturer', manufacturer_name, res_handler['id'])
                     return response['rows'][0]['id']
                 else: return None
             except (KeyError, IndexError):
@@ -294,22 +208,32 @@ class Monitor:
         payload = resolve_payload("manufacturer", values)
         response = send_request('POST', endpoint, payload=payload)
         if response.get('status') == 'success':
-            return True
+            manufacturer_id = created_id(response)
+            get_cache().set('manufacturer', manufacturer_name, manufacturer_id)
+            return manufacturer_id
         else:
             raise Exception(f"Failed to post manufacturer: {response.get('messages')}")
 
     def get_or_create_manufacturer(self, manufacturer_name):
-        """Get or create manufacturer in Snipe-IT."""
+        """Get or create manufacturer in Snipe-IT, once per run."""
+        return self.registry.resolve(('manufacturer', manufacturer_name), lambda: self.resolve_manufacturer(manufacturer_name))
+
+    def resolve_manufacturer(self, manufacturer_name):
+        """Look up the manufacturer in Snipe-IT and create it if it doesn't exist yet."""
         manufacturer_id = self.get_manufacturer(manufacturer_name)
         if manufacturer_id is None:
             print(f"Creating new manufacturer: {manufacturer_name}")
-            success = self.post_manufacturer(manufacturer_name)
-            if success:
+            manufacturer_id = self.post_manufacturer(manufacturer_name)
+            if manufacturer_id is None:
+                # Only look it up again if the response didn't include the new ID
                 manufacturer_id = self.get_manufacturer(manufacturer_name)
         return manufacturer_id
 
     def get_model(self, model_name, manufacturer_id):
         """Get model ID from Snipe-IT."""
+        cached_id = get_cache().get('model', model_key(model_name, manufacturer_id))
+        if cached_id is not None:
+            return cached_id
         endpoint = f'models?limit=1&search={model_name}&manufacturer_id={manufacturer_id}&sort=name&order=asc'
         response = send_request('GET', endpoint)
         # Check for API error response
@@ -321,6 +245,7 @@ class Monitor:
             try:
                 res_handler = response['rows'][0]
                 if res_handler['name'] == model_name:
+                    get_cache().set('model', model_key(model_name, manufacturer_id), res_handler['id'])
                     return response['rows'][0]['id']
                 else: return None
             except (KeyError, IndexError):
@@ -341,52 +266,59 @@ class Monitor:
         payload = resolve_payload("model", values)
         response = send_request('POST', endpoint, payload=payload)
         if response.get('status') == 'success':
-            return True
+            model_id = created_id(response)
+            get_cache().set('model', model_key(model_name, manufacturer_id), model_id)
+            return model_id
         else:
+            invalidate_rejected(response.get('messages'), payload)
             raise Exception(f"Failed to post model: {response.get('messages')}")
 
     def get_or_create_model(self, model_name, model_number, manufacturer_id):
-        """Get or create model in Snipe-IT."""
+        """Get or create model in Snipe-IT, once per run."""
+        return self.registry.resolve(('model', model_name, manufacturer_id), lambda: self.resolve_model(model_name, model_number, manufacturer_id))
+
+    def resolve_model(self, model_name, model_number, manufacturer_id):
+        """Look up the model in Snipe-IT and create it if it doesn't exist yet."""
         model_id = self.get_model(model_name, manufacturer_id)
         if model_id is None:
             print(f"Creating new model: {model_name}")
-            success = self.post_model(
+            model_id = self.post_model(
                 model_name, 
                 model_number, 
                 manufacturer_id, 
-                GlobalSettings().config['DEFAULTS']['snipeit_monitor_category_id'], 
-                GlobalSettings().config['DEFAULTS']['snipeit_monitor_fieldset_id']
+                get_settings().config['DEFAULTS']['snipeit_monitor_category_id'], 
+                get_settings().config['DEFAULTS']['snipeit_monitor_fieldset_id']
             )
-            if success:
+            if model_id is None:
+                # Only look it up again if the response didn't include the new ID
                 model_id = self.get_model(model_name, manufacturer_id)
         return model_id
 
     def get_hardware(self, serial_number):
         """Get hardware asset ID from Snipe-IT using serial number."""
+        cached_id = get_cache().get('hardware', serial_number)
+        if cached_id is not None:
+            return cached_id
         endpoint = f'hardware/byserial/{serial_number}?deleted=false'
-        try:
-            response = send_request('GET', endpoint)
-            # Check for API error response
-            if response.get('status') == 'error':
-                # "Asset does not exist" is an expected message when checking for new monitors
-                if "Asset does not exist" in str(response.get('messages', '')):
-                    return None
-                print("API Error:", response.get('messages', 'Unknown error'))
-                return None
-            # Handle case where 'total' key is missing or 0
-            if response.get('total', 0) != 0:
-                try:
-                    res_handler = response['rows'][0]
-                    if res_handler['serial'] == serial_number:
-                        return response['rows'][0]['id']
-                    else: return None
-                except (KeyError, IndexError):
-                    print("Unexpected response format or empty 'rows'")
-                    return None
-            else:
+        # Errors are raised, a monitor which couldn't be looked up must not be created a second time
+        response = send_request('GET', endpoint)
+        # Check for API error response
+        if response.get('status') == 'error':
+            # "Asset does not exist" is an expected message when checking for new monitors
+            if "Asset does not exist" in str(response.get('messages', '')):
                 return None
-        except Exception as e:
-            print(f"Error checking for existing hardware: {e}")
+            raise Exception(f"API Error: {response.get('messages', 'Unknown error')}")
+        # Handle case where 'total' key is missing or 0
+        if response.get('total', 0) != 0:
+            try:
+                res_handler = response['rows'][0]
+                if res_handler['serial'] == serial_number:
+                    get_cache().set('hardware', serial_number, res_handler['id'])
+                    return response['rows'][0]['id']
+                else: return None
+            except (KeyError, IndexError):
+                raise KeyError("Unexpected response format or empty 'rows'")
+        else:
             return None
 
     def post_hardware(self, serial_number, model_id, monitor_name, status_id, company_id, collected_hardware):
@@ -400,10 +332,15 @@ class Monitor:
         payload = resolve_payload("hardware", values, collected_hardware)
         payload['company_id'] = company_id
         payload['status_id'] = status_id
-        response = send_request('POST', endpoint, payload=payload)
+        response = send_or_spool('POST', endpoint, payload, key=serial_number)
         if response.get('status') == 'success':
-            return True
+            hardware_id = created_id(response)
+            if hardware_id is not None:
+                get_cache().set('hardware', serial_number, hardware_id)
+                get_sync_state().record(hardware_id, payload)
+            return hardware_id
         else:
+            invalidate_rejected(response.get('messages'), payload)
             raise Exception(f"Failed to post hardware: {response.get('messages')}")
 
     def patch_hardware(self, hardware_id, serial_number, model_id, monitor_name, collected_hardware):
@@ -415,80 +352,111 @@ class Monitor:
             'model_id': model_id
         }
         payload = resolve_payload("hardware", values, collected_hardware)
-        response = send_request('PATCH', endpoint, payload=payload)
+        # Only send the fields which changed since the last successful sync
+        changes = get_sync_state().changes(hardware_id, payload)
+        if not changes:
+            print("No changes since the last sync, skipping update")
+            return True
+        # The full payload is spooled, the fingerprints may be stale by the time it's replayed
+        response = send_or_spool('PATCH', endpoint, changes, key=serial_number, spool_payload=payload, hardware_id=hardware_id)
         if response.get('status') == 'success':
+            get_sync_state().record(hardware_id, payload)
             return True
         else:
             print(f"Failed to update hardware: {response.get('messages')}")
+            invalidate_rejected(response.get('messages'), changes)
+            if is_missing(response):
+                # The cached asset ID belongs to a deleted asset, look the serial number up again next time
+                get_cache().invalidate('hardware', serial_number)
             return False
 
     def process_monitors(self):
         """Process all detected monitors and sync with Snipe-IT."""
-        self.collect_monitor_data()
         results = []
         
         for monitor in self.collected_monitors:
-            manufacturer_name = monitor['manufacturer']
-            model_name = monitor['model']
-            serial_number = monitor['serial_number']
-            collected_hardware = monitor['collected_hardware']
+            result = self.sync_monitor(monitor)
+            if result is not None:
+                results.append(result)
             
-            # Skip monitors with invalid data
-            if (serial_number == "Unknown" or not serial_number or 
-                serial_number == "0" or len(serial_number) < 2 or
-                model_name == "Unknown" or not model_name):
-                print(f"Skipping monitor with insufficient data: {manufacturer_name} {model_name} - {serial_number}")
-                continue
-                
+        return results
+
+    def sync_monitor(self, monitor):
+        """Sync a single collected monitor with Snipe-IT, returns None if it was skipped or failed."""
+        manufacturer_name = monitor['manufacturer']
+        model_name = monitor['model']
+        serial_number = monitor['serial_number']
+        collected_hardware = monitor['collected_hardware']
+        
+        # Skip monitors with invalid data
+        if (serial_number == "Unknown" or not serial_number or 
+            serial_number == "0" or len(serial_number) < 2 or
+            model_name == "Unknown" or not model_name):
+            print(f"Skipping monitor with insufficient data: {manufacturer_name} {model_name} - {serial_number}")
+            return None
+            
+        # Create monitor name (for display purposes)
+        monitor_name = f"{manufacturer_name} {model_name}"
+
+        try:
             # Get or create manufacturer
             manufacturer_id = self.get_or_create_manufacturer(manufacturer_name)
-            
+
             # Get or create model
             model_id = self.get_or_create_model(model_name, model_name, manufacturer_id)
-            
-            # Check if monitor already exists
+        except Exception as e:
+            # Eg. Snipe-IT is down, the monitor is synced again on the next run and the computer isn't held up
+            print(f"Error resolving monitor {monitor_name}: {e}")
+            return None
+
+        # Check if monitor already exists
+        try:
             hardware_id = self.get_hardware(serial_number)
-            
-            # Create monitor name (for display purposes)
-            monitor_name = f"{manufacturer_name} {model_name}"
-            
-            if hardware_id is None:
-                print(f"Creating new monitor: {monitor_name} - {serial_number}")
-                try:
-                    success = self.post_hardware(
-                        serial_number, 
-                        model_id, 
-                        monitor_name, 
-                        GlobalSettings().config['DEFAULTS']['snipeit_status_id'], 
-                        GlobalSettings().config['DEFAULTS']['snipeit_company_id'],
-                        collected_hardware
-                    )
-                    if success:
-                        hardware_id = self.get_hardware(serial_number)
-                except Exception as e:
-                    print(f"Error creating monitor {monitor_name}: {e}")
-                    continue
-            else:
-                print(f"Updating monitor: {monitor_name} - {serial_number}")
-                try:
-                    success = self.patch_hardware(
-                        hardware_id,
-                        serial_number, 
-                        model_id, 
-                        monitor_name,
-                        collected_hardware
-                    )
-                except Exception as e:
-                    print(f"Error updating monitor {monitor_name}: {e}")
-                    continue
-            
-            results.append({
-                'hardware_id': hardware_id,
-                'manufacturer_id': manufacturer_id, 
-                'manufacturer_name': manufacturer_name,
-                'model_id': model_id, 
-                'model_name': model_name,
-                'serial_number': serial_number
-            })
-            
-        return results
\ No newline at end of file
+        except Exception as e:
+            # Creating it without knowing would duplicate it once Snipe-IT is back, it is synced again on the next run
+            print(f"Error checking for existing monitor {monitor_name}: {e}")
+            return None
+        
+        if hardware_id is None:
+            print(f"Creating new monitor: {monitor_name} - {serial_number}")
+            try:
+                hardware_id = self.post_hardware(
+                    serial_number, 
+                    model_id, 
+                    monitor_name, 
+                    get_settings().config['DEFAULTS']['snipeit_status_id'], 
+                    get_settings().config['DEFAULTS']['snipeit_company_id'],
+                    collected_hardware
+                )
+                if hardware_id is None:
+                    # Only look it up again if the response didn't include the new ID
+                    hardware_id = self.get_hardware(serial_number)
+            except Exception as e:
+                print(f"Error creating monitor {monitor_name}: {e}")
+                return None
+        else:
+            print(f"Updating monitor: {monitor_name} - {serial_number}")
+            try:
+                success = self.patch_hardware(
+                    hardware_id,
+                    serial_number, 
+                    model_id, 
+                    monitor_name,
+                    collected_hardware
+                )
+            except Exception as e:
+                if is_not_found(e):
+                    # The cached asset ID no longer exists, it is looked up again on the next run
+                    get_cache().invalidate('hardware', serial_number)
+                    get_sync_state().forget(hardware_id)
+                print(f"Error updating monitor {monitor_name}: {e}")
+                return None
+        
+        return {
+            'hardware_id': hardware_id,
+            'manufacturer_id': manufacturer_id, 
+            'manufacturer_name': manufacturer_name,
+            'model_id': model_id, 
+            'model_name': model_name,
+            'serial_number': serial_number
+        }
@@ -0,0 +1,31 @@
+# registry.py
+
+import threading
+
+class ResolutionRegistry:
+    """Remembers which manufacturers and models were already resolved during this run.
+
+    Each key is resolved at most once, callers asking for a key which is being
+    resolved at that moment wait for the first resolution instead of repeating it.
+    """
+
+    def __init__(self):
+        self.resolved = {}
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, key, resolver):
+        with self._lock:
+            if key in self.resolved:
+                return self.resolved[key]
+            key_lock = self.pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self.resolved:
+                    return self.resolved[key]
+            result = resolver()
+            # Failed resolutions are not remembered so a later caller can try again
+            if result is not None:
+                with self._lock:
+                    self.resolved[key] = result
+            return result
@@ -1,27 +1,66 @@
 # client.py
 
 from models.assets.manager import AssetManager
-from config.settings import GlobalSettings
-from utils.common import run_command
+from runtime.report import finish_run
+from api.spool import get_spool, is_transient
+from config.settings import get_settings
+from utils.tracing import reset_tracer, span
 
 class PyITAgent:
-    def __init__(self):
-        self.config = GlobalSettings().config
-        self.custom_fields = GlobalSettings().custom_fields
+    def __init__(self, async_pipeline=None):
+        settings = get_settings()
+        self.config = settings.config
+        self.custom_fields = settings.custom_fields
         self.metadata = {}
         self.hardware = {}
         self.monitors = []
+        if async_pipeline is None:
+            async_pipeline = self.config['GENERAL'].get('async_pipeline', False)
+        self.async_pipeline = async_pipeline
 
     def runtime(self):
-        asset_manager = AssetManager()  # Create a single instance of AssetManager
+        # Every run is traced, its report is written even when the run fails
+        tracer = reset_tracer()
+        error = None
+        try:
+            if self.async_pipeline:
+                # asyncio is only imported by runs which use it
+                from runtime.pipeline import AsyncPipeline
+                return AsyncPipeline(self).run()
+            return self.sync()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            finish_run(tracer, self, error)
+
+    def sync(self):
+        # Updates which couldn't be sent on an earlier run go out first
+        with span('phase', 'spool'):
+            get_spool().drain()
+
+        # Assets collect on first use, a disabled computer or monitor sync collects nothing
+        asset_manager = AssetManager()
 
         # Process computer asset if enabled
         if self.config['GENERAL']['pyitagent_asset_collection']:
-            self.metadata['hostname'] = run_command("(Get-WmiObject Win32_OperatingSystem).CSName")
-            self.metadata['manufacturer_id'], self.hardware['manufacturer_name'] = asset_manager.manufacturer.get_or_create_manufacturer()
-            self.metadata['model_id'], self.hardware['model_number'], self.hardware['model'] = asset_manager.model.get_or_create_model(self.metadata, self.hardware)
-            self.metadata['hardware_id'], temp_new_hardware = asset_manager.hardware.get_or_create_hardware(self.metadata, self.hardware)
-            self.hardware.update(temp_new_hardware)
+            with span('phase', 'inventory'):
+                self.metadata['hostname'] = asset_manager.inventory.get('hostname')
+            try:
+                with span('phase', 'manufacturer'):
+                    self.metadata['manufacturer_id'], self.hardware['manufacturer_name'] = asset_manager.manufacturer.get_or_create_manufacturer()
+                with span('phase', 'model'):
+                    self.metadata['model_id'], self.hardware['model_number'], self.hardware['model'] = asset_manager.model.get_or_create_model(self.metadata, self.hardware)
+                with span('phase', 'hardware_collect'):
+                    asset_manager.hardware.collect_hardware_data()
+                with span('phase', 'hardware_sync'):
+                    self.metadata['hardware_id'], temp_new_hardware = asset_manager.hardware.get_or_create_hardware(self.metadata, self.hardware)
+                self.hardware.update(temp_new_hardware)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                # A lookup failed before the asset was resolved, keep what was collected for the next run
+                asset_manager.hardware.spool_unresolved(asset_manager.manufacturer.manufacturer_name, self.metadata, e)
 
             print(self.metadata)
             print(self.hardware)
@@ -29,7 +68,8 @@ class PyITAgent:
         # Process monitor assets if enabled
         if self.config['GENERAL'].get('pyitagent_asset_monitor_collection', False):
             print("Collecting monitor information...")
-            self.monitors = asset_manager.monitor.process_monitors()
+            with span('phase', 'monitors'):
+                self.monitors = asset_manager.monitor.process_monitors()
             
             if self.monitors:
                 print(f"Processed {len(self.monitors)} monitors")
@@ -0,0 +1,56 @@
+# daemon.py
+
+import threading
+import time
+
+from runtime.client import PyITAgent
+from api.fingerprint import set_full_sync
+from config.settings import get_settings, reload_settings
+
+class Daemon:
+    """Keeps the agent resident and syncs again every `interval` seconds.
+
+    Nothing is torn down between cycles: the HTTP session, the ID cache, the sync
+    fingerprints and the PowerShell hosts all stay warm, so a cycle costs a fresh
+    inventory and, when nothing changed, no request besides the lookups which aren't cached.
+    """
+
+    def __init__(self, interval=None, async_pipeline=None, delay=0):
+        self.interval = interval
+        self.async_pipeline = async_pipeline
+        self.delay = delay
+        self.cycles = 0
+        self._stop = threading.Event()
+
+    def get_interval(self):
+        if self.interval is not None:
+            return self.interval
+        return get_settings().config['GENERAL'].get('daemon_interval', 3600)
+
+    def stop(self):
+        self._stop.set()
+
+    def cycle(self):
+        # Pick up changes to config.ini or custom_fields.json without restarting
+        reload_settings()
+        try:
+            PyITAgent(async_pipeline=self.async_pipeline).runtime()
+        except Exception as e:
+            # A failed cycle (eg. Snipe-IT being down) must not end the daemon, the next one retries
+            print(f"Sync failed, retrying in {self.get_interval()} seconds: {e}")
+        finally:
+            # --full-sync only applies to the first cycle, afterwards only changes are sent
+            set_full_sync(False)
+        self.cycles += 1
+
+    def run(self, max_cycles=None):
+        print(f"Running as a daemon, syncing every {self.get_interval()} seconds")
+        if self.delay and self._stop.wait(self.delay):
+            return
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.cycle()
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            self._stop.wait(max(0, self.get_interval() - (time.monotonic() - started)))
+        print("Daemon stopped")
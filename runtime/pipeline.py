@@ -0,0 +1,84 @@
+# pipeline.py
+
+import asyncio
+
+from models.assets.manager import AssetManager
+from api.spool import get_spool, is_transient
+from utils.tracing import span
+
+class AsyncPipeline:
+    """Runs the sync of the computer and its monitors concurrently.
+
+    The HTTP session and the PowerShell host pool are shared and blocking, so every
+    step runs in a worker thread while asyncio orchestrates them. For every entity the
+    manufacturer -> model -> asset order is kept, but probes, monitor detection and
+    the Snipe-IT calls of independent entities overlap.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.asset_manager = None
+
+    def run(self):
+        return asyncio.run(self.run_async())
+
+    async def run_async(self):
+        # The static inventory snapshot takes one round trip, meanwhile the updates spooled on an
+        # earlier run are sent first. Monitors don't need the inventory, so it's only taken for the computer.
+        self.asset_manager = AssetManager()
+        prepare = [self.phase('spool', get_spool().drain)]
+        if self.agent.config['GENERAL']['pyitagent_asset_collection']:
+            prepare.append(self.phase('inventory', lambda: self.asset_manager.inventory.snapshot))
+        await asyncio.gather(*prepare)
+
+        tasks = []
+        if self.agent.config['GENERAL']['pyitagent_asset_collection']:
+            tasks.append(self.sync_computer())
+        if self.agent.config['GENERAL'].get('pyitagent_asset_monitor_collection', False):
+            tasks.append(self.sync_monitors())
+        await asyncio.gather(*tasks)
+
+    async def phase(self, name, function, *args):
+        # Run a blocking step in a worker thread, timed as a phase of the run
+        with span('phase', name):
+            return await asyncio.to_thread(function, *args)
+
+    async def sync_computer(self):
+        agent = self.agent
+        asset_manager = self.asset_manager
+        agent.metadata['hostname'] = asset_manager.inventory.get('hostname')
+
+        # Custom field probes don't depend on Snipe-IT, run them while the lookups are in flight
+        collect = asyncio.create_task(self.phase('hardware_collect', asset_manager.hardware.collect_hardware_data))
+        try:
+            try:
+                agent.metadata['manufacturer_id'], agent.hardware['manufacturer_name'] = await self.phase('manufacturer', asset_manager.manufacturer.get_or_create_manufacturer)
+                agent.metadata['model_id'], agent.hardware['model_number'], agent.hardware['model'] = await self.phase('model', asset_manager.model.get_or_create_model, agent.metadata, agent.hardware)
+            finally:
+                await collect
+            agent.metadata['hardware_id'], temp_new_hardware = await self.phase('hardware_sync', asset_manager.hardware.get_or_create_hardware, agent.metadata, agent.hardware)
+            agent.hardware.update(temp_new_hardware)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            # A lookup failed before the asset was resolved, keep what was collected for the next run
+            await asyncio.to_thread(asset_manager.hardware.spool_unresolved, asset_manager.manufacturer.manufacturer_name, agent.metadata, e)
+
+        print(agent.metadata)
+        print(agent.hardware)
+
+    async def sync_monitors(self):
+        monitor = self.asset_manager.monitor
+        print("Collecting monitor information...")
+        with span('phase', 'monitors'):
+            collected_monitors = await asyncio.to_thread(lambda: monitor.collected_monitors)
+
+            # Identical monitors share their manufacturer and model through the resolution registry
+            results = await asyncio.gather(*(asyncio.to_thread(monitor.sync_monitor, collected) for collected in collected_monitors))
+        self.agent.monitors = [result for result in results if result is not None]
+
+        if self.agent.monitors:
+            print(f"Processed {len(self.agent.monitors)} monitors")
+            print(self.agent.monitors)
+        else:
+            print("No monitors detected or processed")
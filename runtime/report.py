@@ -0,0 +1,96 @@
+# report.py
+
+import json
+import os
+from datetime import datetime, timezone
+
+from config.settings import get_settings
+from utils.store import state_path
+import config.constants as c
+
+# Phases of a run, in the order they happen
+PHASES = ['spool', 'inventory', 'manufacturer', 'model', 'hardware_collect', 'hardware_sync', 'monitors']
+
+def summarize(spans, slowest=5):
+    return {
+        'count': len(spans),
+        'total': round(sum(span.duration for span in spans), 3),
+        'slowest': [span.to_dict() for span in sorted(spans, key=lambda span: span.duration, reverse=True)[:slowest]],
+    }
+
+class RunReport:
+    """A compact summary of one run built from its trace, to find slow probes and requests across the fleet."""
+
+    def __init__(self, tracer, agent, error=None):
+        self.tracer = tracer
+        self.agent = agent
+        self.error = error
+
+    def build(self):
+        phases = {}
+        for span in self.tracer.of_kind('phase'):
+            phases[span.name] = round(phases.get(span.name, 0) + span.duration, 3)
+        requests = self.tracer.of_kind('request')
+        commands = self.tracer.of_kind('command')
+        return {
+            'version': c.VERSION,
+            'hostname': self.agent.metadata.get('hostname'),
+            'hardware_id': self.agent.metadata.get('hardware_id'),
+            'started': datetime.fromtimestamp(self.tracer.started, tz=timezone.utc).isoformat(),
+            'wall': round(self.tracer.elapsed(), 3),
+            'error': str(self.error) if self.error is not None else None,
+            'phases': {name: phases[name] for name in sorted(phases, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES))},
+            'commands': summarize(commands),
+            'requests': dict(summarize(requests),
+                             sent=sum(span.attributes.get('sent', 0) for span in requests),
+                             received=sum(span.attributes.get('received', 0) for span in requests),
+                             errors=sum(1 for span in requests if 'error' in span.attributes or span.attributes.get('status', 0) >= 400)),
+            'spans': [span.to_dict() for span in self.tracer.spans],
+        }
+
+    def summary(self, report=None):
+        """A one paragraph summary of the report, as pushed to Slack or Snipe-IT."""
+        report = report or self.build()
+        phases = ", ".join(f"{name} {duration:.1f}s" for name, duration in report['phases'].items())
+        text = f"{report['hostname']} synced in {report['wall']:.1f}s ({phases}). "
+        text += f"{report['commands']['count']} commands took {report['commands']['total']:.1f}s"
+        if report['commands']['slowest']:
+            slowest = report['commands']['slowest'][0]
+            text += f", slowest {slowest['name']} {slowest['duration']:.1f}s"
+        text += f". {report['requests']['count']} requests took {report['requests']['total']:.1f}s with {report['requests']['errors']} errors."
+        if report['error']:
+            text += f" The run failed: {report['error']}"
+        return text
+
+    def write(self, report=None):
+        path = state_path('pyitagent_report.json')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                json.dump(report or self.build(), file, separators=(',', ':'), default=str)
+        except OSError as e:
+            print(f"Could not write the run report {path}: {e}")
+
+    def push(self, report=None):
+        config = get_settings().config
+        report = report or self.build()
+        if config['DEBUGGING'].get('slack_run_report', False):
+            from api.slack import SlackAPI
+            SlackAPI().send_to_slack(self.summary(report), config['DEBUGGING']['slack_webhook'])
+        field = config['GENERAL'].get('run_report_field')
+        if field and report['hardware_id'] is not None:
+            from api.handler import send_request
+            try:
+                send_request('PATCH', f"hardware/{report['hardware_id']}", payload={field: self.summary(report)})
+            except Exception as e:
+                print(f"Could not send the run report to Snipe-IT: {e}")
+
+def finish_run(tracer, agent, error=None):
+    """Write the run report and push its summary where configured, never failing the run itself."""
+    if not get_settings().config['GENERAL'].get('run_report', True):
+        return None
+    run_report = RunReport(tracer, agent, error)
+    report = run_report.build()
+    run_report.write(report)
+    run_report.push(report)
+    return report
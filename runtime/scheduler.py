@@ -0,0 +1,57 @@
+# scheduler.py
+
+import hashlib
+import socket
+import time
+
+from config.settings import get_settings
+from utils.store import JsonStore
+
+class Scheduler:
+    """Spreads the syncs of a fleet, all triggered by the same GPO, over a window of time.
+
+    Every host waits a fixed splay derived from its hostname before syncing, so the same
+    host always lands on the same spot of the window and the fleet is spread evenly over it.
+    Hosts which synced successfully within the minimum interval skip the run entirely.
+    """
+
+    def __init__(self, hostname=None):
+        general = get_settings().config['GENERAL']
+        # socket avoids starting PowerShell just to learn our own name
+        self.hostname = hostname or socket.gethostname()
+        self.window = general.get('schedule_window', 1800)
+        self.min_interval = general.get('schedule_min_interval', 12.0) * 3600
+        self.store = JsonStore('pyitagent_schedule.json')
+
+    def splay(self):
+        """Seconds this host waits after being triggered, stable between runs."""
+        if self.window <= 0:
+            return 0
+        digest = hashlib.sha256(self.hostname.lower().encode()).hexdigest()
+        return int(digest[:8], 16) % self.window
+
+    def last_sync(self):
+        return self.store.load().get('last_sync')
+
+    def due(self, now=None):
+        last_sync = self.last_sync()
+        if last_sync is None or self.min_interval <= 0:
+            return True
+        now = time.time() if now is None else now
+        return now - last_sync >= self.min_interval
+
+    def wait(self):
+        """Return False if this host synced recently, otherwise sleep for its splay and return True."""
+        if not self.due():
+            hours = (time.time() - self.last_sync()) / 3600
+            print(f"Last synced {hours:.1f} hours ago, skipping this run")
+            return False
+        splay = self.splay()
+        if splay:
+            print(f"Waiting {splay} seconds before syncing to spread the load on Snipe-IT")
+            time.sleep(splay)
+        return True
+
+    def record_sync(self):
+        self.store.load()['last_sync'] = time.time()
+        self.store.save()
@@ -1,7 +1,6 @@
 # common.py
 
 import sys
-import subprocess
 import os
 
 # Resolve pyinstaller's stoopid windows executable path issue
@@ -17,30 +16,10 @@ def resolve_path(path):
 
     return resolved_path
 
-def run_command(cmd):
-    # The flag to prevent the console window from showing up
-    CREATE_NO_WINDOW = 0x08000000
-    
-    # Execute the command without showing a window
-    try:
-        completed = subprocess.Popen(["powershell.exe", "-Command", cmd],
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE,
-                                    text=True,
-                                    creationflags=CREATE_NO_WINDOW)
-    except:
-        raise Exception("Could not open powershell.exe")
-    
-    # Wait for the command to complete and get the output
-    stdout, stderr = completed.communicate()
-    
-    # Return the standard output
-    return stdout.strip()
-
 def format_number(val):
     try:
-        # Try converting the input to a float, replacing commas with dots if necessary
-        number = float(val.replace(',', '.'))
+        # Numbers from a probe are used as is, otherwise try converting the input to a float, replacing commas with dots if necessary
+        number = float(val) if isinstance(val, (int, float)) else float(val.replace(',', '.'))
         # Check if the number is an integer by comparing it with its integer version
         if number == int(number):
             # If it's an integer, return the integer part
@@ -48,6 +27,6 @@ def format_number(val):
         else:
             # If it's a float, format it with a comma instead of a dot
             return "{:.1f}".format(number).replace('.', ',')
-    except ValueError:
+    except (ValueError, AttributeError):
         # If conversion to a float fails, return the original input
         return val
\ No newline at end of file
@@ -1,23 +1,25 @@
 # exception.py
 
-from api.slack import SlackAPI
-from config.settings import GlobalSettings
+from config.settings import get_settings
 import config.constants as c
 import sys
-import traceback
-from utils.common import run_command
+from collectors.registry import get_collector
 
 class ExceptionHandler:
     @staticmethod
     def raise_for_error(self, e = None):
         error_message = f"An error occurred in the PyITAgent script: {e}"
         print(error_message)
-        config = GlobalSettings().config
+        config = get_settings().config
 
         if config['DEBUGGING']['slack_logging']:
+            # Only failed runs which report to Slack need the Slack client (and requests)
+            import traceback
+            from api.slack import SlackAPI
             slack = SlackAPI()
-            hostname = run_command("(Get-WmiObject Win32_OperatingSystem).CSName")
-            windows_user = run_command("[System.Security.Principal.WindowsIdentity]::GetCurrent().Name")
+            collector = get_collector()
+            hostname = collector.inventory(['hostname']).get('hostname', "")
+            windows_user = collector.current_user()
             error_message += f"\nError occured on computer: {hostname}\n"
             error_message += f"Error occured on user: {windows_user}\n"
             error_message += f"Error occured on version: {c.VERSION}\n"
@@ -0,0 +1,235 @@
+# powershell.py
+
+import atexit
+import base64
+import os
+import queue
+import shlex
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+# The flag to prevent the console window from showing up
+CREATE_NO_WINDOW = 0x08000000
+
+# Default command line, can be swapped (eg. for a fake shell run by python) via the environment
+DEFAULT_COMMAND = [part.strip('"') for part in shlex.split(os.environ.get('PYITAGENT_POWERSHELL', 'powershell.exe'), posix=os.name != 'nt')]
+DEFAULT_EXECUTABLE = DEFAULT_COMMAND[0]
+DEFAULT_ARGUMENTS = DEFAULT_COMMAND[1:] + ['-NoLogo', '-NoProfile', '-NonInteractive', '-ExecutionPolicy', 'Bypass', '-Command', '-']
+DEFAULT_TIMEOUT = 120
+# Seconds a command waits for a busy session before the pool starts another one, about what
+# powershell.exe takes to start, so a short queue is worked off by the sessions already running
+GROW_AFTER = 1.0
+
+class PowerShellHost:
+    """A long-lived PowerShell session which executes commands one at a time.
+
+    Every command is sent as a single line on stdin and its output is framed by
+    a unique end marker written to both stdout and stderr, so the host can be
+    reused for the whole run instead of spawning powershell.exe per command.
+    """
+
+    def __init__(self, executable=None, arguments=None):
+        self.executable = executable or DEFAULT_EXECUTABLE
+        self.arguments = list(DEFAULT_ARGUMENTS if arguments is None else arguments)
+        self.process = None
+        self.spawn_count = 0
+        self._stdout = None
+        self._stderr = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the shell process if it is not already running."""
+        if self.is_alive():
+            return
+        self.stop()
+        try:
+            self.process = subprocess.Popen([self.executable, *self.arguments],
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE,
+                                            text=True,
+                                            encoding='utf-8',
+                                            errors='replace',
+                                            bufsize=1,
+                                            creationflags=CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        except OSError:
+            self.process = None
+            raise Exception(f"Could not open {self.executable}")
+        self.spawn_count += 1
+        self._stdout = self._start_reader(self.process.stdout)
+        self._stderr = self._start_reader(self.process.stderr)
+        # Make sure the session speaks UTF-8 back to us
+        self._write("[Console]::OutputEncoding = [System.Text.Encoding]::UTF8")
+
+    def _start_reader(self, stream):
+        lines = queue.Queue()
+
+        def pump():
+            for line in stream:
+                lines.put(line.rstrip('\r\n'))
+            lines.put(None)  # End of stream, the host has died
+
+        threading.Thread(target=pump, daemon=True).start()
+        return lines
+
+    def _write(self, line):
+        self.process.stdin.write(line + '\n')
+        self.process.stdin.flush()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self, force=False):
+        """Terminate the shell process, if any."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            if process.poll() is None and not force:
+                process.stdin.close()
+                process.wait(timeout=2)
+        except Exception:
+            pass
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    def build_frame(self, cmd, marker):
+        """Wrap a command into a single line which ends with the marker on both streams."""
+        encoded = base64.b64encode(cmd.encode('utf-8')).decode('ascii')
+        return (
+            "$__pyit_status = 0; "
+            "try { "
+            f"& ([ScriptBlock]::Create([System.Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}')))) 2>&1 | "
+            "ForEach-Object { if ($_ -is [System.Management.Automation.ErrorRecord]) { [Console]::Error.WriteLine($_); $__pyit_status = 1 } "
+            "elseif ($_ -is [string]) { [Console]::Out.WriteLine($_) } "
+            "else { $_ | Out-String -Stream -Width 4096 | ForEach-Object { [Console]::Out.WriteLine($_) } } } "
+            "} catch { [Console]::Error.WriteLine($_); $__pyit_status = 1 }; "
+            f"[Console]::Error.WriteLine('{marker}'); [Console]::Out.WriteLine('{marker} ' + $__pyit_status)"
+        )
+
+    def _read_until(self, lines, marker, deadline):
+        output = []
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError
+            try:
+                line = lines.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError
+            if line is None:
+                raise BrokenPipeError
+            if line.startswith(marker):
+                return output, line[len(marker):].strip()
+            output.append(line)
+
+    def execute(self, cmd, timeout=DEFAULT_TIMEOUT):
+        """Run a command in the session and return (stdout, stderr, status).
+
+        The host is restarted once if it died in between commands. If the command
+        does not finish within the timeout the host is killed so the next command
+        gets a fresh session, and a TimeoutError is raised.
+        """
+        with self._lock:
+            for attempt in range(2):
+                self.start()
+                marker = f"__PYITAGENT_END_{os.urandom(16).hex()}__"
+                deadline = None if timeout is None else time.monotonic() + timeout
+                try:
+                    self._write(self.build_frame(cmd, marker))
+                    stdout, status = self._read_until(self._stdout, marker, deadline)
+                    stderr, _ = self._read_until(self._stderr, marker, deadline)
+                except TimeoutError:
+                    self.stop(force=True)
+                    raise
+                except (BrokenPipeError, OSError):
+                    # The host died underneath us, restart it and try again
+                    self.stop()
+                    if attempt:
+                        raise Exception(f"{self.executable} exited unexpectedly")
+                    continue
+                return '\n'.join(stdout), '\n'.join(stderr), int(status or 0)
+
+class HostPool:
+    """A pool of PowerShell hosts so several commands can run side by side.
+
+    The first command starts a host, later ones wait for an idle host and only start
+    another when they have been waiting for grow_after seconds, counted from when the
+    last host was started. A run with a handful of quick probes keeps using one session,
+    and no more than max_hosts are started however many threads are waiting.
+    """
+
+    def __init__(self, factory=PowerShellHost, grow_after=GROW_AFTER, max_hosts=None):
+        self.factory = factory
+        self.grow_after = grow_after
+        self.max_hosts = max_hosts
+        self.hosts = []
+        self.idle = []
+        self._last_spawn = 0.0
+        self._ready = threading.Condition()
+
+    def limit(self):
+        """How many hosts may run at once, max_hosts under [GENERAL] unless the pool was given one."""
+        if self.max_hosts is not None:
+            return self.max_hosts
+        from config.settings import get_settings
+        general = get_settings().config['GENERAL']
+        return max(1, general.get('max_hosts', general.get('probe_workers', 4)))
+
+    @contextmanager
+    def acquire(self):
+        limit = self.limit()
+        with self._ready:
+            waiting = time.monotonic()
+            while not self.idle:
+                remaining = None
+                if len(self.hosts) < limit:
+                    remaining = max(waiting, self._last_spawn) + self.grow_after - time.monotonic()
+                    if not self.hosts or remaining <= 0:
+                        host = self.factory()
+                        self.hosts.append(host)
+                        self._last_spawn = time.monotonic()
+                        break
+                # At the limit only a host being released helps
+                self._ready.wait(remaining)
+            else:
+                host = self.idle.pop()
+        try:
+            yield host
+        finally:
+            with self._ready:
+                self.idle.append(host)
+                self._ready.notify()
+
+    def spawn_count(self):
+        return sum(host.spawn_count for host in self.hosts)
+
+    def stop(self):
+        with self._ready:
+            for host in self.hosts:
+                host.stop()
+            self.hosts = []
+            self.idle = []
+
+_pool = HostPool()
+
+def acquire_host():
+    """Borrow an idle PowerShell host from the process wide pool."""
+    return _pool.acquire()
+
+def get_pool():
+    return _pool
+
+def set_host_factory(factory):
+    """Swap how PowerShell hosts are created (eg. with a fake shell for testing)."""
+    global _pool
+    _pool.stop()
+    _pool = HostPool(factory)
+
+def shutdown():
+    _pool.stop()
+
+atexit.register(shutdown)
@@ -0,0 +1,118 @@
+# probe.py
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from utils.powershell import acquire_host, DEFAULT_TIMEOUT
+from utils.tracing import get_tracer, command_key
+
+# Windows PowerShell 5.1 serializes dates as "/Date(<milliseconds>)/"
+MS_DATE = re.compile(r'^/Date\((-?\d+)(?:[+-]\d{4})?\)/$')
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+
+class ProbeResult:
+    """The outcome of a probe: its parsed value, exit status, stderr and how long it took."""
+
+    def __init__(self, value=None, status=0, stderr="", duration=0.0, timed_out=False):
+        self.value = value
+        self.status = status
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.status == 0 and not self.timed_out
+
+    @property
+    def empty(self):
+        return self.ok and self.value in (None, "", [])
+
+    def __repr__(self):
+        return f"ProbeResult(value={self.value!r}, status={self.status}, timed_out={self.timed_out}, duration={self.duration:.3f})"
+
+def convert(value):
+    # Turn JSON values into native Python types, dates included
+    if isinstance(value, str):
+        match = MS_DATE.match(value)
+        if match:
+            return datetime.fromtimestamp(int(match.group(1)) / 1000, tz=timezone.utc)
+        if ISO_DATE.match(value):
+            try:
+                return datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return value
+        return value
+    if isinstance(value, list):
+        return [convert(item) for item in value]
+    if isinstance(value, dict):
+        # PowerShell 5.1 wraps some dates in an object with their DisplayHint
+        if 'DateTime' in value and 'value' in value:
+            return convert(value['value'])
+        return {key: convert(item) for key, item in value.items()}
+    return value
+
+def build_probe(cmd):
+    # Let PowerShell serialize whatever the command outputs, so we don't have to scrape text
+    return f"& {{\n{cmd}\n}} | ConvertTo-Json -Compress -Depth 4"
+
+def run_probe(cmd, timeout=DEFAULT_TIMEOUT, name=None):
+    """Run a command and return its output parsed from JSON as a ProbeResult.
+
+    The name is what the probe is called in the run report, by default the command's first line.
+    """
+    started = time.perf_counter()
+    try:
+        with acquire_host() as host:
+            stdout, stderr, status = host.execute(build_probe(cmd), timeout=timeout)
+    except TimeoutError:
+        print(f"PowerShell probe timed out after {timeout} seconds")
+        duration = time.perf_counter() - started
+        get_tracer().add('command', name or command_key(cmd), started, duration, {'timed_out': True})
+        return ProbeResult(status=1, duration=duration, timed_out=True)
+    duration = time.perf_counter() - started
+    get_tracer().add('command', name or command_key(cmd), started, duration, {'status': status})
+
+    stdout = stdout.strip()
+    if not stdout:
+        return ProbeResult(None, status, stderr, duration)
+    try:
+        value = convert(json.loads(stdout))
+    except json.JSONDecodeError:
+        # Not JSON after all (eg. an error message), keep the raw text
+        value = stdout
+    return ProbeResult(value, status, stderr, duration)
+
+def run_probes(commands, max_workers=4, timeout=DEFAULT_TIMEOUT, probe=run_probe):
+    """Run probes concurrently, each item is either a command or a (command, timeout) tuple.
+
+    The results are returned in the same order as the commands. probe runs a single command,
+    collectors pass their own.
+    """
+    commands = [command if isinstance(command, tuple) else (command, timeout) for command in commands]
+    if len(commands) <= 1 or max_workers <= 1:
+        return [probe(cmd, cmd_timeout) for cmd, cmd_timeout in commands]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(commands))) as executor:
+        futures = [executor.submit(probe, cmd, cmd_timeout) for cmd, cmd_timeout in commands]
+        return [future.result() for future in futures]
+
+def as_list(value):
+    # A single object comes back as a dict, several as a list
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def as_text(value):
+    """Render a probe value the way it would have been printed on the console."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, list):
+        return "\n".join(as_text(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
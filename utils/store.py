@@ -0,0 +1,48 @@
+# store.py
+
+import json
+import os
+import threading
+
+from utils.common import resolve_path
+from config.settings import get_settings
+
+def state_path(filename):
+    # Local state files live next to the executable unless [GENERAL] state_directory points elsewhere
+    directory = get_settings().config.get('GENERAL', {}).get('state_directory', '')
+    return resolve_path(os.path.join(directory, filename))
+
+class JsonStore:
+    """A small JSON document on disk, loaded on first access and written atomically."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.data = None
+        self._lock = threading.RLock()
+
+    def path(self):
+        return state_path(self.filename)
+
+    def load(self):
+        with self._lock:
+            if self.data is None:
+                try:
+                    with open(self.path(), 'r') as file:
+                        self.data = json.load(file)
+                except (OSError, json.JSONDecodeError):
+                    # A missing or corrupt state file simply starts over
+                    self.data = {}
+            return self.data
+
+    def save(self):
+        with self._lock:
+            path = self.path()
+            directory = os.path.dirname(path)
+            temp_path = f"{path}.tmp"
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(temp_path, 'w') as file:
+                    json.dump(self.load(), file)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Could not write {path}: {e}")
@@ -0,0 +1,74 @@
+# tracing.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+class Span:
+    """One timed operation: a phase of the run, a PowerShell command or an HTTP request."""
+
+    __slots__ = ('kind', 'name', 'start', 'duration', 'attributes')
+
+    def __init__(self, kind, name, start, duration=0.0, attributes=None):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.attributes = attributes or {}
+
+    def to_dict(self):
+        return {'kind': self.kind, 'name': self.name, 'start': round(self.start, 4), 'duration': round(self.duration, 4), **self.attributes}
+
+class Tracer:
+    """Collects the spans of a single run, cheap enough to always be on."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind, name, **attributes):
+        """Time the body, the yielded dict can be filled with attributes known only afterwards."""
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except Exception as e:
+            attributes['error'] = type(e).__name__
+            raise
+        finally:
+            self.add(kind, name, start, time.perf_counter() - start, attributes)
+
+    def add(self, kind, name, start, duration, attributes=None):
+        span = Span(kind, name, start - self.origin, duration, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def elapsed(self):
+        return time.perf_counter() - self.origin
+
+    def of_kind(self, kind):
+        with self._lock:
+            return [span for span in self.spans if span.kind == kind]
+
+_tracer = Tracer()
+
+def get_tracer():
+    return _tracer
+
+def reset_tracer():
+    """Start a new trace, eg. at the start of every run of the daemon."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def span(kind, name, **attributes):
+    return _tracer.span(kind, name, **attributes)
+
+def command_key(cmd, length=80):
+    # The first line of a command is enough to recognise it in a report
+    lines = [line.strip() for line in cmd.strip().splitlines() if line.strip()]
+    key = lines[0] if lines else ""
+    return key if len(key) <= length else key[:length - 3] + "..."